@@ -11,6 +11,22 @@ import FlyingCardAnimation from './FlyingCardAnimation';
 //const API_BASE_URL = 'https://f1dcfea1a82a.ngrok-free.app'; // <<< REPLACE WITH YOUR NGROK URL <<<
 const API_BASE_URL = 'https://kanbanflow-web.onrender.com';
 
+// Every browser tab gets its own simulation session on the backend, so workshop
+// participants no longer share (and overwrite) one board.
+const SESSION_ID = (() => {
+  const storageKey = 'kanbanflow-session-id';
+  let sessionId = window.sessionStorage.getItem(storageKey);
+  if (!sessionId) {
+    sessionId = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+    window.sessionStorage.setItem(storageKey, sessionId);
+  }
+  return sessionId;
+})();
+const API_HEADERS = {
+  'ngrok-skip-browser-warning': 'true',
+  'X-Session-Id': SESSION_ID
+};
+
 const Board = () => {
   const [lanes, setLanes] = useState([]);
   const [dashboardData, setDashboardData] = useState([]);
@@ -116,7 +132,7 @@ const Board = () => {
         method: 'POST',
         headers: { 
           'Content-Type': 'application/json',
-          'ngrok-skip-browser-warning': 'true'
+          ...API_HEADERS
         },
         body: JSON.stringify({ complexity, wip_limit: wipLimit, speed: simSpeed }),
       });
@@ -151,7 +167,7 @@ const Board = () => {
       // Now attempt to start the simulation itself
       const response = await fetch(`${API_BASE_URL}/simulation/start`, {
         method: 'POST',
-        headers: { 'ngrok-skip-browser-warning': 'true' }
+        headers: API_HEADERS
       });
       const data = await response.json();
       if (response.ok) {
@@ -180,7 +196,7 @@ const Board = () => {
     try {
       const response = await fetch(`${API_BASE_URL}/simulation/stop`, {
         method: 'POST',
-        headers: { 'ngrok-skip-browser-warning': 'true' }
+        headers: API_HEADERS
       });
       const data = await response.json();
       if (response.ok) {
@@ -200,7 +216,7 @@ const Board = () => {
     try {
       const response = await fetch(`${API_BASE_URL}/dashboard/clear`, {
         method: 'POST',
-        headers: { 'ngrok-skip-browser-warning': 'true' }
+        headers: API_HEADERS
       });
       const data = await response.json();
       if (response.ok) {
@@ -214,127 +230,106 @@ const Board = () => {
     }
   }, []);
 
-  // --- Polling for Board State and Dashboard Data ---
-  // Fetches simulation data periodically from backend
+  // --- Streaming Board State and Dashboard Data ---
+  // The backend pushes one "board" frame per simulated day and a "dashboard" frame
+  // whenever a round finishes (Server-Sent Events), so there is nothing to poll.
   useEffect(() => {
-    let intervalId;
-    const pollingInterval = 1000; // Poll every 1 second
-
-    const fetchSimulationData = async () => {
-      // Fetch board state
-      try {
-        const boardResponse = await fetch(`${API_BASE_URL}/simulation/status`, {
-          headers: { 'ngrok-skip-browser-warning': 'true' }
-        });
-          
-        const boardData = await boardResponse.json();
-        if (boardResponse.ok) {
-          setSimulationRunning(boardData.is_running); // Sync running status from backend
-
-          setLanes(prevLanes => {
-            const newLanes = boardData.lanes;
-            if (!prevLanes.length) return newLanes; // First load, no animation needed, just set initial state
-
-            const cardsToAnimateData = []; // Store data for cards that need gliding
-
-            // Step 1: Create a quick lookup map for cards in the *previous* state
-            const oldCardsMap = new Map();
-            prevLanes.forEach(lane => {
-                lane.cards.forEach(card => {
-                    oldCardsMap.set(card.id, card);
-                });
+    const applyBoardData = (boardData) => {
+      setSimulationRunning(boardData.is_running); // Sync running status from backend
+
+      setLanes(prevLanes => {
+        const newLanes = boardData.lanes;
+        if (!prevLanes.length) return newLanes; // First load, no animation needed, just set initial state
+
+        const cardsToAnimateData = []; // Store data for cards that need gliding
+
+        // Step 1: Create a quick lookup map for cards in the *previous* state
+        const oldCardsMap = new Map();
+        prevLanes.forEach(lane => {
+            lane.cards.forEach(card => {
+                oldCardsMap.set(card.id, card);
             });
+        });
 
-            // Step 2: Iterate through cards in the *new* state to detect moves
-            for (const newLane of newLanes) {
-                for (const newCard of newLane.cards) {
-                    const oldCard = oldCardsMap.get(newCard.id);
-
-                    // Condition for triggering a glide animation:
-                    // 1. The card existed in the previous state.
-                    // 2. Its current lane (newCard.col) is different from its previous lane (oldCard.col).
-                    if (oldCard && oldCard.col !== newCard.col) {
-                        const cardElement = cardRefs.current.get(oldCard.id); // Try to get the DOM element of the OLD card
-
-                        // Only attempt to animate if the old card's DOM element is *still present*
-                        // at its previous location when we poll.
-                        if (cardElement) {
-                            cardsToAnimateData.push({
-                                card: oldCard, // Pass the OLD card data to the animation clone
-                                newLaneId: newCard.col, // The new column ID is the target lane ID
-                                startRect: cardElement.getBoundingClientRect() // Capture START position from the OLD element
-                            });
-                        } else {
-                            console.warn(`[Gliding-Fix] Old element for card ${oldCard.id} (from lane ${oldCard.col} to ${newCard.col}) not found for animation. Skipping glide.`);
-                        }
+        // Step 2: Iterate through cards in the *new* state to detect moves
+        for (const newLane of newLanes) {
+            for (const newCard of newLane.cards) {
+                const oldCard = oldCardsMap.get(newCard.id);
+
+                // Condition for triggering a glide animation:
+                // 1. The card existed in the previous state.
+                // 2. Its current lane (newCard.col) is different from its previous lane (oldCard.col).
+                if (oldCard && oldCard.col !== newCard.col) {
+                    const cardElement = cardRefs.current.get(oldCard.id); // Try to get the DOM element of the OLD card
+
+                    // Only attempt to animate if the old card's DOM element is *still present*
+                    // at its previous location when the frame arrives.
+                    if (cardElement) {
+                        cardsToAnimateData.push({
+                            card: oldCard, // Pass the OLD card data to the animation clone
+                            newLaneId: newCard.col, // The new column ID is the target lane ID
+                            startRect: cardElement.getBoundingClientRect() // Capture START position from the OLD element
+                        });
+                    } else {
+                        console.warn(`[Gliding-Fix] Old element for card ${oldCard.id} (from lane ${oldCard.col} to ${newCard.col}) not found for animation. Skipping glide.`);
                     }
                 }
             }
+        }
 
-            // Immediately push animation data to the ref, then force re-render
-            // This ensures FlyingCardAnimation components are mounted quickly when original hides.
-            cardsToAnimateData.forEach(animData => {
-                flyingAnimations.current.push({
-                    id: `flying-${animData.card.id}-${Date.now()}`, // Unique ID for this animation instance
-                    card: animData.card,
-                    startRect: animData.startRect,
-                    endRect: null // Will be updated by requestAnimationFrame
-                });
+        // Immediately push animation data to the ref, then force re-render
+        // This ensures FlyingCardAnimation components are mounted quickly when original hides.
+        cardsToAnimateData.forEach(animData => {
+            flyingAnimations.current.push({
+                id: `flying-${animData.card.id}-${Date.now()}`, // Unique ID for this animation instance
+                card: animData.card,
+                startRect: animData.startRect,
+                endRect: null // Will be updated by requestAnimationFrame
             });
-            flyingAnimations.current = [...flyingAnimations.current]; // Force re-render
-
-            // Schedule endRect calculation after React updates DOM for newLanes
-            requestAnimationFrame(() => {
-                flyingAnimations.current = flyingAnimations.current.map(anim => {
-                    // Only process animations that have a startRect but no endRect yet
-                    if (anim.startRect && anim.endRect === null) {
-                        const newCardInDOM = cardRefs.current.get(anim.card.id);
-                        if (newCardInDOM) {
-                            const endRect = newCardInDOM.getBoundingClientRect();
-                            return { ...anim, endRect: endRect };
-                        } else {
-                            console.warn(`[Gliding-Fix] Card ${anim.card.id} not found in new DOM position for endRect. Cancelling animation clone.`);
-                            return null;
-                        }
+        });
+        flyingAnimations.current = [...flyingAnimations.current]; // Force re-render
+
+        // Schedule endRect calculation after React updates DOM for newLanes
+        requestAnimationFrame(() => {
+            flyingAnimations.current = flyingAnimations.current.map(anim => {
+                // Only process animations that have a startRect but no endRect yet
+                if (anim.startRect && anim.endRect === null) {
+                    const newCardInDOM = cardRefs.current.get(anim.card.id);
+                    if (newCardInDOM) {
+                        const endRect = newCardInDOM.getBoundingClientRect();
+                        return { ...anim, endRect: endRect };
+                    } else {
+                        console.warn(`[Gliding-Fix] Card ${anim.card.id} not found in new DOM position for endRect. Cancelling animation clone.`);
+                        return null;
                     }
-                    return anim; // Return already completed animations as is
-                }).filter(Boolean); // Remove any null entries (cancelled animations)
-                flyingAnimations.current = [...flyingAnimations.current]; // Force re-render after updating endRects
-            });
+                }
+                return anim; // Return already completed animations as is
+            }).filter(Boolean); // Remove any null entries (cancelled animations)
+            flyingAnimations.current = [...flyingAnimations.current]; // Force re-render after updating endRects
+        });
 
-            return newLanes; // This updates the React `lanes` state with the new board data
-          });
+        return newLanes; // This updates the React `lanes` state with the new board data
+      });
+    };
 
-        } else {
-          console.error('Failed to fetch board state:', boardData);
-          setSimulationRunning(false);
-        }
-      } catch (error) {
-        console.error('Network error fetching board state:', error);
-        setSimulationRunning(false);
-      }
+    const streamUrl = `${API_BASE_URL}/simulation/stream?session_id=${encodeURIComponent(SESSION_ID)}`;
+    const eventSource = new EventSource(streamUrl);
 
-      // Fetch dashboard data
-      try {
-        const dashboardResponse = await fetch(`${API_BASE_URL}/dashboard/data`, {
-          headers: { 'ngrok-skip-browser-warning': 'true' }
-        });
-        const dashboardData = await dashboardResponse.json();
-        if (dashboardResponse.ok) {
-          setDashboardData(dashboardData.dashboard_entries || []);
-        } else {
-          console.error('Failed to fetch dashboard data:', dashboardData);
-        }
-      } catch (error) {
-        console.error('Network error fetching dashboard data:', error);
-      }
+    eventSource.addEventListener('board', (event) => {
+      applyBoardData(JSON.parse(event.data));
+    });
+    eventSource.addEventListener('dashboard', (event) => {
+      const dashboardData = JSON.parse(event.data);
+      setDashboardData(dashboardData.dashboard_entries || []);
+    });
+    eventSource.onerror = (error) => {
+      // EventSource reconnects on its own; the first frame after reconnecting is a full board.
+      console.error('Board stream interrupted, reconnecting:', error);
     };
 
-    fetchSimulationData(); // Initial fetch on mount
-    intervalId = setInterval(fetchSimulationData, pollingInterval); // Set up polling interval
     return () => {
-      clearInterval(intervalId); // Clear interval on component unmount
-      console.log('Polling interval cleared.');
+      eventSource.close(); // Close the stream on component unmount
+      console.log('Board stream closed.');
     };
   }, [programmaticMoveCard]); // Re-run effect if programmaticMoveCard callback changes (unlikely)
 
@@ -0,0 +1,7 @@
+# kanban-python-backend/benchmarks/__init__.py
+# Run the benchmarks from kanban-python-backend, e.g. `python -m benchmarks.memory`.
+# `python -m benchmarks.engine --save-baseline` records a baseline on this machine;
+# `python -m benchmarks.engine --compare` later flags regressions against it.
+# `python -m benchmarks.wire_format` compares payload bytes and encode time per wire format.
+# `python -m benchmarks.loadtest` replays classrooms polling like Board.js (in-process, or
+# `--uvicorn` for a real server) and reports throughput, latency, loop lag and RSS per level.
@@ -0,0 +1,250 @@
+# kanban-python-backend/benchmarks/engine.py
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import kanban_engine
+import vector_engine
+from workflow import linear_workflow
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from main import BoardStateModel
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.10 # Relative change in the "worse" direction that counts as a regression
+MIN_CASE_SECONDS = 0.3 # Each timed case repeats until it has run at least this long
+COMPLEXITY = {"1": 1, "3": 1, "5": 4}
+
+
+def _metric(value: float, unit: str, better: str) -> dict:
+    return {"value": value, "unit": unit, "better": better}
+
+
+def _long_round_model(days: int, wip_limit: int, headless: bool, workflow=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = kanban_engine.KanbanModel(headless=headless, workflow=workflow)
+        model.events.disable()
+        model.set_parameters(COMPLEXITY if workflow is None else {}, wip_limit, 0.0)
+        model._red_card_delay_days = days + 1 # Keep the round going for the whole run
+        model.start()
+    return model
+
+
+def _best_of(repeat: int, func, min_seconds: float = MIN_CASE_SECONDS) -> float:
+    """Shortest wall time of at least ``repeat`` runs, repeated until ``min_seconds`` have passed.
+
+    The minimum is the least disturbed run, which keeps comparisons stable on busy machines.
+    """
+    timings = []
+    while len(timings) < repeat or sum(timings) < min_seconds:
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+# --- Cases ---
+def bench_steps(wip_limits, run_lengths, repeat: int) -> dict:
+    """Steps per second of advance_one_simulation_step per board size (WIP limit) and run length."""
+    metrics = {}
+    for headless in (False, True):
+        mode = "headless" if headless else "interactive"
+        for wip_limit in wip_limits:
+            for days in run_lengths:
+                def run():
+                    model = _long_round_model(days, wip_limit, headless)
+                    step = model.advance_one_simulation_step
+                    for _ in range(days):
+                        step()
+                elapsed = _best_of(repeat, run)
+                metrics[f"steps_per_second/{mode}/wip={wip_limit}/days={days}"] = _metric(days / elapsed, "steps/s", "higher")
+    return metrics
+
+
+def bench_columns(stage_counts, days: int, repeat: int) -> dict:
+    """Step cost per card on the board for linear workflows of growing size (3 stages = 8 columns)."""
+    metrics = {}
+    for stages in stage_counts:
+        workflow = linear_workflow(stages)
+        cards = []
+        def run():
+            model = _long_round_model(days, 5, False, workflow)
+            step = model.advance_one_simulation_step
+            for _ in range(days):
+                step()
+            cards.append(sum(len(column) for column in model.columns[:-1]))
+        elapsed = _best_of(repeat, run)
+        metrics[f"step_us_per_card/columns={workflow.column_count}"] = _metric(
+            elapsed / days / max(cards[-1], 1) * 1e6, "us", "lower")
+    return metrics
+
+
+def bench_round_end(days_into_round, repeat: int) -> dict:
+    """Round-end bookkeeping (_compute_round_metrics) on boards with a growing Done archive."""
+    metrics = {}
+    for days in days_into_round:
+        model = _long_round_model(days, 5, headless=False)
+        for _ in range(days):
+            model.advance_one_simulation_step()
+        calls = 1_000
+        def run():
+            compute = model._compute_round_metrics
+            for _ in range(calls):
+                compute()
+        metrics[f"round_end_us/days={days}"] = _metric(_best_of(repeat, run) / calls * 1e6, "us", "lower")
+    return metrics
+
+
+def bench_status(days_into_round, samples: int) -> dict:
+    """Latency of get_current_board_state plus BoardStateModel validation, at several board ages."""
+    metrics = {}
+    for days in days_into_round:
+        model = _long_round_model(days, 5, headless=False)
+        for _ in range(days):
+            model.advance_one_simulation_step()
+        state_timings, validate_timings = [], []
+        model.get_current_board_state() # Warm-up
+        for _ in range(samples):
+            started = time.perf_counter()
+            state = model.get_current_board_state()
+            built = time.perf_counter()
+            BoardStateModel.model_validate(state)
+            state_timings.append(built - started)
+            validate_timings.append(time.perf_counter() - built)
+        total = [a + b for a, b in zip(state_timings, validate_timings)]
+        cards = len(model.cards)
+        metrics[f"status_latency_us/p50/days={days}"] = _metric(statistics.median(total) * 1e6, "us", "lower")
+        metrics[f"status_latency_us/p95/days={days}"] = _metric(
+            statistics.quantiles(total, n=20)[-1] * 1e6, "us", "lower")
+        metrics[f"status_state_us/p50/days={days}"] = _metric(statistics.median(state_timings) * 1e6, "us", "lower")
+        metrics[f"status_validate_us/p50/days={days}"] = _metric(statistics.median(validate_timings) * 1e6, "us", "lower")
+        metrics[f"status_cards/days={days}"] = _metric(cards, "cards", "lower")
+    return metrics
+
+
+def bench_rounds(wip_limits, repeat: int, vector_boards: int) -> dict:
+    """Time for one complete headless round: stepped, fast-forwarded and as a VectorBoards batch."""
+    metrics = {}
+    for wip_limit in wip_limits:
+        def run():
+            kanban_engine.simulate_round(COMPLEXITY, wip_limit, fast_forward=False)
+        metrics[f"round_ms/wip={wip_limit}"] = _metric(_best_of(repeat, run) * 1000, "ms", "lower")
+        def run_fast_forward():
+            kanban_engine.simulate_round(COMPLEXITY, wip_limit, red_card_delay_days=10_000, max_days=100_000)
+        metrics[f"fast_forward_round_ms/delay=10000/wip={wip_limit}"] = _metric(
+            _best_of(repeat, run_fast_forward) * 1000, "ms", "lower")
+    configs = [(COMPLEXITY, wip_limits[index % len(wip_limits)]) for index in range(vector_boards)]
+    elapsed = _best_of(repeat, lambda: vector_engine.simulate_rounds(configs))
+    metrics[f"vector_rounds_per_second/boards={vector_boards}"] = _metric(vector_boards / elapsed, "rounds/s", "higher")
+    return metrics
+
+
+def bench_session_memory(sessions: int, days: int) -> dict:
+    """Bytes held per session (registry entry plus board) after ``days`` simulated days."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        registry = kanban_engine.SessionRegistry(max_sessions=sessions)
+        for index in range(sessions):
+            model = registry.create(f"bench-{index}").model
+            model.set_parameters(COMPLEXITY, 5, 0.0)
+            model.start()
+            for _ in range(days):
+                model.advance_one_simulation_step()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {f"session_bytes/days={days}": _metric(current / sessions, "bytes", "lower")}
+
+
+def run_benchmarks(quick: bool = False) -> dict:
+    if quick:
+        wip_limits, run_lengths, repeat = [1, 12], [100, 1_000], 2
+        status_days, samples, vector_boards, sessions = [10, 200], 500, 200, 50
+    else:
+        wip_limits, run_lengths, repeat = [1, 5, 12, 50], [100, 1_000, 10_000], 3
+        status_days, samples, vector_boards, sessions = [10, 200, 1_000], 2_000, 2_000, 200
+    metrics = {}
+    metrics.update(bench_steps(wip_limits, run_lengths, repeat))
+    metrics.update(bench_columns([3, 10, 24], run_lengths[-1], repeat))
+    metrics.update(bench_status(status_days, samples))
+    metrics.update(bench_round_end(run_lengths[1:], repeat))
+    metrics.update(bench_rounds(wip_limits, repeat, vector_boards))
+    metrics.update(bench_session_memory(sessions, 25))
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rules_version": kanban_engine.ENGINE_RULES_VERSION,
+            "quick": quick,
+        },
+        "metrics": metrics,
+    }
+
+
+# --- Comparison ---
+def compare(results: dict, baseline: dict, threshold: float) -> list[dict]:
+    """Per metric present in both runs: relative change and whether it is a regression."""
+    rows = []
+    for name, metric in results["metrics"].items():
+        base = baseline.get("metrics", {}).get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (metric["value"] - base["value"]) / base["value"]
+        worse = -change if metric["better"] == "higher" else change
+        rows.append({
+            "metric": name,
+            "baseline": base["value"],
+            "value": metric["value"],
+            "change": change,
+            "regression": worse > threshold,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput, latency and memory benchmarks of kanban_engine.")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a fast smoke run")
+    parser.add_argument("--output", help="write the results JSON to this file (default: stdout)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"also store the results as {DEFAULT_BASELINE}")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, metavar="BASELINE",
+                        help="compare against a stored results file (default: the saved baseline)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown that counts as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.quick)
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(payload)
+    elif not args.compare:
+        print(payload)
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, "w") as file:
+            file.write(payload)
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as file:
+        baseline = json.load(file)
+    rows = compare(results, baseline, args.threshold)
+    print(f"{'metric':<52} {'baseline':>12} {'current':>12} {'change':>8}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['metric']:<52} {row['baseline']:>12.1f} {row['value']:>12.1f} {row['change']:>+8.1%}{flag}")
+    regressions = sum(row["regression"] for row in rows)
+    print(f"{len(rows)} metrics compared, {regressions} regressions (threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
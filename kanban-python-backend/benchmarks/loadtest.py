@@ -0,0 +1,413 @@
+# kanban-python-backend/benchmarks/loadtest.py
+"""Simulated workshop traffic against main.app.
+
+Needs httpx (in requirements.txt) besides the app's own dependencies. From
+kanban-python-backend:
+
+    python -m benchmarks.loadtest                      # in-process, 1/10/50/100 classrooms
+    python -m benchmarks.loadtest --uvicorn            # real HTTP against a local uvicorn
+    python -m benchmarks.loadtest --profile --classrooms 50
+"""
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+import metrics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# What Board.js sends and how often it polls (its pollingInterval and default controls).
+COMPLEXITY = {"1": 1, "3": 1, "5": 4}
+WIP_LIMIT = 5
+SPEED = 1.0
+POLL_INTERVAL = 1.0
+LAG_INTERVAL = 0.01 # Timer period of the in-process event loop lag monitor
+SERVER_START_TIMEOUT = 15.0
+
+# --- Profile Categories ---
+# A sample is attributed to the innermost frame that matches a rule below (frames
+# such as contextlib or functools match none and are skipped), so a json.dumps call
+# inside the engine counts as serialization and a step inside an endpoint as engine.
+# Samples whose innermost frame waits for work (idle executor threads, the event loop
+# in select) are idle and left out of the shares.
+IDLE_FRAMES = {("selectors.py", "select"), ("threading.py", "wait"), ("queue.py", "get"), ("thread.py", "_worker")}
+SERIALIZATION_FILES = {"wire_format.py", "board_stream.py", "gzip.py"}
+SERIALIZATION_PACKAGES = ("/json/", "/msgpack/", "/pydantic/", "/pydantic_core/")
+SERIALIZATION_FUNCTIONS = {
+    "to_row", "to_dict", "get_current_board_state", "get_current_board_columns", "get_current_board_state_json",
+    "serialize_response", "jsonable_encoder", "render",
+}
+ENGINE_FILES = {
+    "kanban_engine.py", "workflow.py", "flow_metrics.py", "steady_state.py", "vector_engine.py", "event_log.py",
+    "dashboard_store.py", "round_cache.py", "snapshot_store.py", "forecasting.py",
+}
+CLIENT_PACKAGES = ("/httpx/", "/httpcore/", "loadtest.py")
+FRAMEWORK_FILES = {"main.py", "tick_scheduler.py", "metrics.py"}
+FRAMEWORK_PACKAGES = ("/fastapi/", "/starlette/", "/anyio/", "/asyncio/", "/concurrent/futures/", "/uvicorn/")
+CATEGORIES = ("engine", "serialization", "framework", "client", "other")
+
+
+def _frame_category(frame: str) -> str | None:
+    path, _, function = frame.rpartition(":")
+    name = os.path.basename(path)
+    if name in SERIALIZATION_FILES or function in SERIALIZATION_FUNCTIONS or any(p in path for p in SERIALIZATION_PACKAGES):
+        return "serialization"
+    if name in ENGINE_FILES:
+        return "engine"
+    if any(package in path for package in CLIENT_PACKAGES):
+        return "client"
+    if name in FRAMEWORK_FILES or any(package in path for package in FRAMEWORK_PACKAGES):
+        return "framework"
+    return None
+
+
+def stack_category(stack: str) -> str:
+    """Category of one collapsed stack ("outer;...;inner"): idle, or the innermost matching frame's."""
+    frames = stack.split(";")
+    path, _, function = frames[-1].rpartition(":")
+    if (os.path.basename(path), function) in IDLE_FRAMES:
+        return "idle"
+    for frame in reversed(frames):
+        category = _frame_category(frame)
+        if category is not None:
+            return category
+    return "other"
+
+
+def profile_shares(collapsed: str) -> dict:
+    """Share of the busy (non-idle) samples per category, from SamplingProfiler.collapsed() output."""
+    counts = dict.fromkeys(CATEGORIES + ("idle",), 0)
+    for line in collapsed.splitlines():
+        stack, _, count = line.rpartition(" ")
+        counts[stack_category(stack)] += int(count)
+    busy = sum(counts[category] for category in CATEGORIES)
+    return {
+        "busy_samples": busy,
+        "idle_samples": counts["idle"],
+        **{category: counts[category] / busy if busy else 0.0 for category in CATEGORIES},
+    }
+
+
+class PathProfiler(metrics.SamplingProfiler):
+    """SamplingProfiler that keeps full file paths, so library frames can be told apart."""
+
+    @staticmethod
+    def _frame_label(code) -> str:
+        return f"{code.co_filename}:{code.co_name}"
+
+
+# --- Measurements ---
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def rss_bytes(pid: int | None = None) -> int | None:
+    """Resident set size of a process (this one by default); None if it cannot be read."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if pid is None:
+        # No /proc (macOS): peak RSS is the best available figure (bytes there, KiB on Linux).
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None
+
+
+async def _sample_rss(pid: int | None, peak: list[int], interval: float = 0.25):
+    while True:
+        rss = rss_bytes(pid)
+        if rss is not None and rss > peak[0]: peak[0] = rss
+        await asyncio.sleep(interval)
+
+
+async def _monitor_lag(lags: list[float]):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(max(0.0, loop.time() - started - LAG_INTERVAL))
+
+
+def _parse_histogram(text: str, name: str) -> tuple[dict[float, int], float, int]:
+    """Cumulative buckets, sum and count of an unlabelled histogram in Prometheus text format."""
+    buckets, total, count = {}, 0.0, 0
+    for line in text.splitlines():
+        if line.startswith(f"{name}_bucket"):
+            bound = line.split('le="', 1)[1].split('"', 1)[0]
+            buckets[float("inf") if bound == "+Inf" else float(bound)] = int(line.rsplit(" ", 1)[1])
+        elif line.startswith(f"{name}_sum"):
+            total = float(line.rsplit(" ", 1)[1])
+        elif line.startswith(f"{name}_count"):
+            count = int(line.rsplit(" ", 1)[1])
+    return buckets, total, count
+
+
+def lag_from_metrics(before: str, after: str) -> dict:
+    """Server-side event loop lag between two /metrics scrapes.
+
+    Only bucket counts are exported, so p99 and max are the upper bounds of the
+    buckets holding them.
+    """
+    name = "kanban_event_loop_lag_seconds"
+    start_buckets, start_sum, start_count = _parse_histogram(before, name)
+    end_buckets, end_sum, end_count = _parse_histogram(after, name)
+    count = end_count - start_count
+    if count <= 0:
+        return {"lag_mean_ms": None, "lag_p99_ms": None, "lag_max_ms": None}
+    deltas = [(bound, end_buckets[bound] - start_buckets.get(bound, 0)) for bound in sorted(end_buckets)]
+    p99 = next(bound for bound, cumulative in deltas if cumulative >= 0.99 * count)
+    highest = next(bound for bound, cumulative in deltas if cumulative >= count)
+    return {"lag_mean_ms": (end_sum - start_sum) / count * 1e3, "lag_p99_ms": p99 * 1e3, "lag_max_ms": highest * 1e3}
+
+
+# --- Classroom Traffic ---
+class Classroom:
+    """One browser tab running Board.js: configure, start, poll every interval, stop, clear."""
+
+    def __init__(self, client: httpx.AsyncClient, session_id: str, samples: list, accept: str, poll_interval: float, speed: float):
+        self.client = client
+        self.session_id = session_id
+        self.samples = samples # (route, seconds, status) of every request; status 0 for transport errors
+        self.headers = {"X-Session-Id": session_id, "Accept": accept}
+        self.poll_interval = poll_interval
+        self.speed = speed
+
+    async def _request(self, method: str, route: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, route, headers=self.headers, **kwargs)
+            status_code = response.status_code
+        except httpx.HTTPError:
+            status_code = 0
+        self.samples.append((f"{method} {route}", time.perf_counter() - started, status_code))
+
+    async def run(self, start_at: float, end_at: float):
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(max(0.0, start_at - loop.time()))
+        await self._request("POST", "/simulation/config",
+                            json={"complexity": COMPLEXITY, "wip_limit": WIP_LIMIT, "speed": self.speed})
+        await self._request("POST", "/simulation/start")
+        # Like setInterval: polls start on a fixed schedule; a slow poll skips the ticks it missed.
+        next_poll = loop.time()
+        while next_poll < end_at:
+            await self._request("GET", "/simulation/status")
+            await self._request("GET", "/dashboard/data")
+            next_poll += self.poll_interval * max(1, int((loop.time() - next_poll) / self.poll_interval) + 1)
+            await asyncio.sleep(max(0.0, next_poll - loop.time()))
+        await self._request("POST", "/simulation/stop")
+        await self._request("POST", "/dashboard/clear")
+
+
+async def run_level(client: httpx.AsyncClient, classrooms: int, args, rng: random.Random, server_pid: int | None,
+                    in_process: bool, profiler: PathProfiler | None) -> dict:
+    """Runs ``classrooms`` concurrent classrooms for ``args.duration`` seconds; one result row."""
+    loop = asyncio.get_running_loop()
+    samples, lags, peak_rss = [], [], [0]
+    session_ids = [f"load-{classrooms}-{index}-{rng.randrange(1 << 30):x}" for index in range(classrooms)]
+    metrics_before = None if in_process else (await client.get("/metrics")).text
+    monitors = [asyncio.create_task(_sample_rss(server_pid, peak_rss))]
+    if in_process: monitors.append(asyncio.create_task(_monitor_lag(lags)))
+    if profiler is not None:
+        profiler.reset()
+        profiler.start(args.profile_interval)
+
+    started = loop.time()
+    end_at = started + args.duration
+    # Tabs are not opened in lockstep: each classroom starts somewhere in the first interval.
+    await asyncio.gather(*(
+        Classroom(client, session_id, samples, args.accept, args.poll_interval, args.speed).run(
+            started + rng.uniform(0, args.poll_interval), end_at)
+        for session_id in session_ids
+    ))
+    elapsed = loop.time() - started
+
+    if profiler is not None: profiler.stop()
+    for monitor in monitors:
+        monitor.cancel()
+    if in_process:
+        lags.sort()
+        lag = {"lag_mean_ms": sum(lags) / len(lags) * 1e3 if lags else None,
+               "lag_p99_ms": _percentile(lags, 0.99) * 1e3, "lag_max_ms": lags[-1] * 1e3 if lags else None}
+    else:
+        lag = lag_from_metrics(metrics_before, (await client.get("/metrics")).text)
+    for session_id in session_ids:
+        await client.delete(f"/sessions/{session_id}")
+
+    latencies = sorted(seconds for _, seconds, _ in samples)
+    routes = {}
+    for route in sorted({route for route, _, _ in samples}):
+        route_samples = [(seconds, status_code) for name, seconds, status_code in samples if name == route]
+        route_latencies = sorted(seconds for seconds, _ in route_samples)
+        routes[route] = {"requests": len(route_samples), "p50_ms": _percentile(route_latencies, 0.5) * 1e3,
+                         "p99_ms": _percentile(route_latencies, 0.99) * 1e3,
+                         "statuses": dict(collections.Counter(status_code for _, status_code in route_samples))}
+    row = {
+        "classrooms": classrooms,
+        "requests": len(samples),
+        # A 400 from /simulation/stop once the round has ended on its own is what the frontend sees too;
+        # errors are server failures and requests that got no response.
+        "errors": sum(1 for _, _, status_code in samples if status_code == 0 or status_code >= 500),
+        "seconds": elapsed,
+        "throughput_rps": len(samples) / elapsed,
+        "p50_ms": _percentile(latencies, 0.5) * 1e3,
+        "p99_ms": _percentile(latencies, 0.99) * 1e3,
+        **lag,
+        "rss_mb": peak_rss[0] / 2**20 if peak_rss[0] else None,
+        "routes": routes,
+    }
+    if profiler is not None:
+        row["profile"] = profile_shares(profiler.collapsed())
+    return row
+
+
+# --- Targets ---
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def uvicorn_server(env_overrides: dict):
+    """A local ``uvicorn main:app`` on a free port; yields (base_url, pid)."""
+    port = _free_port()
+    env = {**os.environ, **env_overrides}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                if httpx.get(base_url + "/").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start in time")
+            time.sleep(0.1)
+        yield base_url, process.pid
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def run_in_process(args, rng: random.Random) -> list[dict]:
+    """Drives main.app through httpx's ASGI transport on this process's event loop.
+
+    Client and server share the loop and the process, so latency includes the load
+    generator's own overhead (the "client" profile share); use --uvicorn for cleaner
+    server numbers.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+        await main.startup_event()
+    profiler = PathProfiler() if args.profile else None
+    rows = []
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            for classrooms in args.classrooms:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    rows.append(await run_level(client, classrooms, args, rng, None, True, profiler))
+        if profiler is not None and args.profile_output:
+            with open(args.profile_output, "w") as file:
+                file.write(profiler.collapsed())
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await main.shutdown_event()
+    return rows
+
+
+async def run_over_http(args, rng: random.Random, base_url: str, server_pid: int | None) -> list[dict]:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        return [await run_level(client, classrooms, args, rng, server_pid, False, None) for classrooms in args.classrooms]
+
+
+def _format_ms(value) -> str:
+    return f"{value:.1f}" if value is not None else "-"
+
+
+def print_table(rows: list[dict]):
+    print(f"{'rooms':>6} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'lag p99':>8} {'lag max':>8} {'RSS MB':>7}")
+    for row in rows:
+        print(f"{row['classrooms']:>6} {row['requests']:>9} {row['errors']:>7} {row['throughput_rps']:>8.1f} "
+              f"{row['p50_ms']:>8.1f} {row['p99_ms']:>8.1f} {_format_ms(row['lag_p99_ms']):>8} "
+              f"{_format_ms(row['lag_max_ms']):>8} {_format_ms(row['rss_mb']):>7}")
+    if any("profile" in row for row in rows):
+        print()
+        print(f"{'rooms':>6} " + " ".join(f"{category:>13}" for category in CATEGORIES) + f" {'samples':>8}")
+        for row in rows:
+            profile = row["profile"]
+            print(f"{row['classrooms']:>6} " + " ".join(f"{profile[category]:>13.1%}" for category in CATEGORIES)
+                  + f" {profile['busy_samples']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulated workshop traffic against the FastAPI app.")
+    parser.add_argument("--classrooms", type=int, nargs="+", default=[1, 10, 50, 100],
+                        help="concurrency levels: classrooms (browser tabs) running at once")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of polling per level")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL, help="seconds between polls (Board.js: 1)")
+    parser.add_argument("--speed", type=float, default=SPEED, help="simulation speed sent with the config, s/day")
+    parser.add_argument("--accept", default="application/json", help="Accept header of the polls")
+    parser.add_argument("--timeout", type=float, default=30.0, help="request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--uvicorn", action="store_true", help="start a local uvicorn and send real HTTP requests")
+    target.add_argument("--url", help="send requests to an already running server instead")
+    parser.add_argument("--server-pid", type=int, help="with --url: process whose RSS to report")
+    parser.add_argument("--profile", action="store_true",
+                        help="(in-process only) attribute sampled time to engine, serialization and framework")
+    parser.add_argument("--profile-interval", type=float, default=0.002, help="profiler sampling interval in seconds")
+    parser.add_argument("--profile-output", help="write the collapsed stacks of the last level to this file")
+    parser.add_argument("--json", action="store_true", help="print the rows as JSON")
+    args = parser.parse_args(argv)
+    if args.profile and (args.uvicorn or args.url):
+        parser.error("--profile samples this process, so it needs the in-process target")
+
+    # The load test should not leave rounds behind in the configured dashboard database.
+    env_overrides = {"KANBAN_DASHBOARD_DB": os.environ.get("KANBAN_DASHBOARD_DB", ":memory:"),
+                     "KANBAN_LOOP_LAG_INTERVAL": os.environ.get("KANBAN_LOOP_LAG_INTERVAL", "0.05")}
+    rng = random.Random(args.seed)
+    if args.uvicorn:
+        with uvicorn_server(env_overrides) as (base_url, pid):
+            rows = asyncio.run(run_over_http(args, rng, base_url, pid))
+    elif args.url:
+        rows = asyncio.run(run_over_http(args, rng, args.url, args.server_pid))
+    else:
+        os.environ.update(env_overrides)
+        rows = asyncio.run(run_in_process(args, rng))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    print_table(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
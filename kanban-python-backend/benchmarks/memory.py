@@ -0,0 +1,90 @@
+# kanban-python-backend/benchmarks/memory.py
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import kanban_engine
+
+
+def measure_card_footprint(card_count: int = 100_000):
+    """Average bytes allocated per Card (object plus any per-card values it owns)."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    cards = [kanban_engine.Card(birth_id, birth_id % 7, x=50) for birth_id in range(1000, 1000 + card_count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # The list holding the cards is not part of the card footprint.
+    allocated -= sys.getsizeof(cards)
+    return allocated / card_count
+
+
+def _long_round_model(days: int, complexity: dict[str, int], wip_limit: int):
+    model = kanban_engine.KanbanModel()
+    model.events.disable()
+    model.set_parameters(complexity, wip_limit, 0.0)
+    model._red_card_delay_days = days + 1 # Keep the round going for the whole run
+    model.start()
+    return model
+
+
+def measure_long_round(days: int, complexity: dict[str, int], wip_limit: int):
+    """Runs an interactive (non-headless) board for ``days`` days and reports its memory.
+
+    Timing comes from a separate untraced run, since tracemalloc slows every allocation.
+    """
+    model = _long_round_model(days, complexity, wip_limit)
+    started = time.perf_counter()
+    for _ in range(days):
+        model.advance_one_simulation_step()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    model = _long_round_model(days, complexity, wip_limit)
+    for _ in range(days):
+        model.advance_one_simulation_step()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    card_count = model.next_card_id - 1
+    return {
+        "days": days,
+        "cards": card_count,
+        "done_cards": len(model.columns[-1]),
+        "traced_bytes": current,
+        "peak_bytes": peak,
+        "bytes_per_card": current / card_count if card_count else 0,
+        "us_per_day": elapsed / days * 1e6,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory footprint of kanban_engine cards and long rounds.")
+    parser.add_argument("--cards", type=int, default=100_000, help="cards allocated for the per-card measurement")
+    parser.add_argument("--days", type=int, nargs="+", default=[1_000, 10_000, 100_000], help="round lengths to run")
+    parser.add_argument("--wip-limit", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    complexity = {"1": 1, "3": 1, "5": 4}
+    results = {
+        "bytes_per_card": measure_card_footprint(args.cards),
+        "long_rounds": [measure_long_round(days, complexity, args.wip_limit) for days in args.days],
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Card footprint: {results['bytes_per_card']:.1f} bytes/card")
+    print(f"{'days':>8} {'cards':>8} {'done':>8} {'traced KiB':>11} {'peak KiB':>9} {'B/card':>7} {'us/day':>7}")
+    for row in results["long_rounds"]:
+        print(
+            f"{row['days']:>8} {row['cards']:>8} {row['done_cards']:>8} {row['traced_bytes'] / 1024:>11.1f} "
+            f"{row['peak_bytes'] / 1024:>9.1f} {row['bytes_per_card']:>7.1f} {row['us_per_day']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# kanban-python-backend/benchmarks/wire_format.py
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+
+import kanban_engine
+import wire_format
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from main import BoardStateModel
+
+COMPLEXITY = {"1": 1, "3": 1, "5": 4}
+MIN_CASE_SECONDS = 0.2
+
+
+def _board(days: int) -> kanban_engine.KanbanModel:
+    """An interactive board ``days`` into a round; the Done archive grows with the days."""
+    model = kanban_engine.KanbanModel()
+    model.events.disable()
+    model.set_parameters(COMPLEXITY, 5, 0.0)
+    model._red_card_delay_days = days + 1
+    model.start()
+    for _ in range(days):
+        model.advance_one_simulation_step()
+    return model
+
+
+def _time_us(func) -> float:
+    """Shortest of repeated runs (at least MIN_CASE_SECONDS in total), in microseconds."""
+    timings = []
+    while len(timings) < 5 or sum(timings) < MIN_CASE_SECONDS:
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1e6
+
+
+def measure_board(days: int) -> list[dict]:
+    """Bytes and uncached encode time of every representation of one board."""
+    model = _board(days)
+    builders = {
+        wire_format.FORMAT_JSON: model.get_current_board_state,
+        wire_format.FORMAT_COLUMNAR: model.get_current_board_columns,
+        wire_format.FORMAT_MSGPACK: model.get_current_board_columns,
+    }
+    cards = sum(len(column) for column in model.columns)
+    rows = []
+
+    # The original path: build the dicts, validate them with Pydantic, render JSON.
+    def pydantic_json():
+        return json.dumps(BoardStateModel.model_validate(model.get_current_board_state()).model_dump(),
+                          separators=(",", ":")).encode()
+    rows.append({"days": days, "cards": cards, "format": "json+pydantic", "encoding": None,
+                 "bytes": len(pydantic_json()), "encode_us": _time_us(pydantic_json)})
+
+    encodings = (None,) + wire_format.ENCODINGS
+    for fmt, build in builders.items():
+        body = wire_format.encode(fmt, build())
+        encode_us = _time_us(lambda: wire_format.encode(fmt, build()))
+        for encoding in encodings:
+            if encoding is None:
+                size, compress_us = len(body), 0.0
+            else:
+                size = len(wire_format.compress(body, encoding)[0]) if len(body) >= wire_format.COMPRESS_MIN_BYTES else len(body)
+                compress_us = _time_us(lambda: wire_format.compress(body, encoding))
+            rows.append({"days": days, "cards": cards, "format": fmt, "encoding": encoding,
+                         "bytes": size, "encode_us": encode_us + compress_us})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Size and encode time of the board wire formats.")
+    parser.add_argument("--days", type=int, nargs="+", default=[10, 200, 2_000], help="board ages to measure")
+    parser.add_argument("--json", action="store_true", help="print the rows as JSON")
+    args = parser.parse_args(argv)
+
+    rows = [row for days in args.days for row in measure_board(days)]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    print(f"{'days':>6} {'cards':>6} {'format':<14} {'encoding':<9} {'bytes':>9} {'encode us':>10}")
+    for row in rows:
+        print(f"{row['days']:>6} {row['cards']:>6} {row['format']:<14} {row['encoding'] or '-':<9} "
+              f"{row['bytes']:>9} {row['encode_us']:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
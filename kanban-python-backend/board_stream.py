@@ -0,0 +1,60 @@
+# kanban-python-backend/board_stream.py
+
+import asyncio
+import json
+
+STREAM_QUEUE_SIZE = 32 # Frames buffered per viewer before the oldest ones are dropped
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Serializes one Server-Sent Events frame."""
+    return format_sse_json(event, json.dumps(data, separators=(',', ':')))
+
+
+def format_sse_json(event: str, data_json: str) -> str:
+    """Server-Sent Events frame around already serialized (single-line) JSON."""
+    return f"event: {event}\ndata: {data_json}\n\n"
+
+
+SSE_KEEPALIVE = ": keepalive\n\n"
+
+
+class BoardBroadcaster:
+    """Fans out serialized board frames to every viewer of a session.
+
+    A frame is serialized once by the publisher and the same string is handed to
+    all subscribers, so the cost of a simulated day does not grow with the number
+    of viewers. Slow viewers lose their oldest frames instead of blocking the
+    simulation loop.
+    """
+
+    def __init__(self, queue_size: int = STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    def subscribe(self, session_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(session_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, session_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(session_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[session_id]
+
+    def has_subscribers(self, session_id: str) -> bool:
+        return session_id in self._subscribers
+
+    def subscriber_count(self, session_id: str | None = None) -> int:
+        if session_id is not None:
+            return len(self._subscribers.get(session_id, ()))
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, session_id: str, frame: str):
+        for queue in self._subscribers.get(session_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame)
@@ -0,0 +1,120 @@
+# kanban-python-backend/dashboard_store.py
+
+import os
+import sqlite3
+import threading
+import time
+
+DASHBOARD_DB_PATH = os.environ.get("KANBAN_DASHBOARD_DB", "kanban_dashboard.db") # ":memory:" keeps nothing on disk
+EXPORT_PAGE_SIZE = 500 # Rows fetched per query while streaming an export
+BUSY_TIMEOUT = 10.0 # Seconds an append waits for another process's write lock
+
+ROUND_COLUMNS = (
+    "position", "round", "wip_limit", "days", "red_card_cycle_time", "flow_efficiency",
+    "in_progress", "done", "throughput", "finished_at",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rounds (
+    session_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    wip_limit INTEGER NOT NULL,
+    days INTEGER NOT NULL,
+    red_card_cycle_time REAL NOT NULL,
+    flow_efficiency REAL NOT NULL,
+    in_progress INTEGER NOT NULL,
+    done INTEGER NOT NULL,
+    throughput REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    PRIMARY KEY (session_id, position)
+) WITHOUT ROWID
+"""
+
+
+class DashboardStore:
+    """Append-only history of finished rounds per session, in SQLite with numeric columns.
+
+    ``position`` numbers a session's rounds 1, 2, 3, ... in the order they finished
+    (the engine's round counter restarts with every start, so it is not unique).
+    The connection is opened on first use and shared by the event loop and the
+    engine threads behind a lock; each append is one small committed insert. Worker
+    processes sharing a database file are serialized by SQLite's write lock (waiting
+    up to ``BUSY_TIMEOUT`` seconds for it).
+    """
+
+    def __init__(self, path: str = DASHBOARD_DB_PATH):
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+            if self.path != ":memory:":
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(_SCHEMA)
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def append(self, session_id: str, round_number: int, wip_limit: int, metrics: dict) -> int:
+        """Stores one finished round and returns its position in the session's history."""
+        with self._lock:
+            db = self._db()
+            # Several worker processes may append to the same session in a shared file:
+            # BEGIN IMMEDIATE takes the write lock before the position is read, so no two
+            # appends can pick the same one.
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                (last,) = db.execute("SELECT COALESCE(MAX(position), 0) FROM rounds WHERE session_id = ?", (session_id,)).fetchone()
+                db.execute(
+                    "INSERT INTO rounds VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (session_id, last + 1, round_number, wip_limit, metrics["days"], metrics["red_card_cycle_time"],
+                     metrics["flow_efficiency"], metrics["in_progress"], metrics["done"], metrics["throughput"], time.time()),
+                )
+                db.commit()
+            except BaseException:
+                db.rollback()
+                raise
+            return last + 1
+
+    def rounds(self, session_id: str, since_position: int = 0, limit: int | None = None) -> list[dict]:
+        """Rounds after ``since_position`` in order, at most ``limit`` of them."""
+        query = f"SELECT {', '.join(ROUND_COLUMNS)} FROM rounds WHERE session_id = ? AND position > ? ORDER BY position"
+        params = [session_id, since_position]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db().execute(query, params).fetchall()
+        return [dict(zip(ROUND_COLUMNS, row)) for row in rows]
+
+    def iter_rounds(self, session_id: str, since_position: int = 0, page_size: int = EXPORT_PAGE_SIZE):
+        """Yields every round after ``since_position``, reading ``page_size`` rows at a time."""
+        while True:
+            page = self.rounds(session_id, since_position, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            since_position = page[-1]["position"]
+
+    def latest_rounds(self, session_id: str, limit: int) -> list[dict]:
+        """The session's last ``limit`` rounds, oldest first."""
+        query = f"SELECT {', '.join(ROUND_COLUMNS)} FROM rounds WHERE session_id = ? ORDER BY position DESC LIMIT ?"
+        with self._lock:
+            rows = self._db().execute(query, (session_id, limit)).fetchall()
+        return [dict(zip(ROUND_COLUMNS, row)) for row in reversed(rows)]
+
+    def clear(self, session_id: str):
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM rounds WHERE session_id = ?", (session_id,))
+            db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
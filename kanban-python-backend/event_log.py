@@ -0,0 +1,64 @@
+# kanban-python-backend/event_log.py
+
+import os
+import time
+from collections import deque
+
+# --- Levels (same numbers as the logging module) ---
+DEBUG = 10
+INFO = 20
+WARNING = 30
+OFF = 100
+
+LEVEL_NAMES = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "OFF": OFF}
+
+DEFAULT_CAPACITY = int(os.environ.get("KANBAN_EVENT_LOG_CAPACITY", "1000"))
+DEFAULT_LEVEL = LEVEL_NAMES.get(os.environ.get("KANBAN_EVENT_LOG_LEVEL", "INFO").upper(), INFO) # DEBUG records every card move
+
+
+class EventLog:
+    """Bounded in-memory ring buffer of structured engine events.
+
+    Callers on the hot path check the precomputed ``debug`` / ``info`` flags before
+    building a record, so a disabled log costs one attribute lookup per call site.
+    Every record gets a monotonically increasing ``seq`` so readers and shippers can
+    ask for "everything after the last record I saw".
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, level: int = DEFAULT_LEVEL):
+        self.records: deque[dict] = deque(maxlen=capacity)
+        self.last_seq = 0
+        self.shipped_seq = 0
+        self.set_level(level)
+
+    def set_level(self, level: int):
+        self.level = level
+        self.debug = level <= DEBUG
+        self.info = level <= INFO
+
+    def disable(self):
+        self.set_level(OFF)
+
+    def emit(self, level: int, event: str, **fields):
+        if level < self.level:
+            return
+        self.last_seq += 1
+        record = {"seq": self.last_seq, "ts": time.time(), "level": level, "event": event}
+        record.update(fields)
+        self.records.append(record)
+
+    def since(self, seq: int = 0) -> list[dict]:
+        """Returns the buffered records with a sequence number greater than ``seq``."""
+        if seq >= self.last_seq:
+            return []
+        return [record for record in self.records if record["seq"] > seq]
+
+    def take_unshipped(self) -> list[dict]:
+        """Returns records not handed to a shipper yet and marks them as shipped."""
+        records = self.since(self.shipped_seq)
+        self.shipped_seq = self.last_seq
+        return records
+
+    def clear(self):
+        self.records.clear()
+        self.shipped_seq = self.last_seq
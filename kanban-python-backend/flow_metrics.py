@@ -0,0 +1,138 @@
+# kanban-python-backend/flow_metrics.py
+
+import bisect
+import itertools
+import math
+import os
+from collections import deque
+
+FLOW_HISTORY_DAYS = int(os.environ.get("KANBAN_FLOW_HISTORY_DAYS", "5000")) # Days of CFD rows kept per board
+DEFAULT_RATE_WINDOW = 10 # Days over which arrival and departure rates are averaged
+CYCLE_TIME_QUANTILES = (0.5, 0.85, 0.95)
+
+
+class TDigest:
+    """Merging t-digest: a bounded summary of a stream of values for quantile estimates.
+
+    Values are buffered and merged into at most about ``compression`` centroids, each
+    a (mean, weight) pair. The arcsine scale function keeps centroids small near the
+    tails, so high quantiles stay accurate while memory stays constant.
+    """
+
+    def __init__(self, compression: int = 100):
+        self.compression = compression
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means: list[float] = []
+        self._weights: list[float] = []
+        self._buffer: list[float] = []
+        self._buffer_size = 5 * compression
+
+    def add(self, value: float):
+        self._buffer.append(value)
+        self.count += 1
+        self.total += value
+        if value < self.min: self.min = value
+        if value > self.max: self.max = value
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(zip(self._means + self._buffer, self._weights + [1.0] * len(self._buffer)))
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+        means, weights = [], []
+        mean, weight = points[0]
+        merged = 0.0 # Weight of the centroids already closed
+        k_limit = self._k(0.0) + 1
+        for next_mean, next_weight in points[1:]:
+            if self._k((merged + weight + next_weight) / total) <= k_limit:
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+                continue
+            means.append(mean)
+            weights.append(weight)
+            merged += weight
+            k_limit = self._k(merged / total) + 1
+            mean, weight = next_mean, next_weight
+        means.append(mean)
+        weights.append(weight)
+        self._means, self._weights = means, weights
+
+    def quantile(self, q: float) -> float | None:
+        """Estimated value at quantile ``q`` (0..1), or None before the first value."""
+        self._compress()
+        means, weights = self._means, self._weights
+        if not means:
+            return None
+        if len(means) == 1:
+            return means[0]
+        target = q * self.count
+        # Interpolate between centroid centers; the outer halves interpolate towards min / max.
+        if target < weights[0] / 2:
+            return self.min + (means[0] - self.min) * target / (weights[0] / 2)
+        cumulative = 0.0
+        for index in range(len(means) - 1):
+            center = cumulative + weights[index] / 2
+            next_center = cumulative + weights[index] + weights[index + 1] / 2
+            if target <= next_center:
+                fraction = (target - center) / (next_center - center)
+                return means[index] + fraction * (means[index + 1] - means[index])
+            cumulative += weights[index]
+        last_center = self.count - weights[-1] / 2
+        fraction = min((target - last_center) / (weights[-1] / 2), 1.0)
+        return means[-1] + (self.max - means[-1]) * fraction
+
+    def summary(self, quantiles=CYCLE_TIME_QUANTILES) -> dict:
+        if not self.count:
+            return {"count": 0, "mean": None, "min": None, "max": None, **{f"p{round(q * 100)}": None for q in quantiles}}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "max": self.max,
+            **{f"p{round(q * 100)}": self.quantile(q) for q in quantiles},
+        }
+
+
+class FlowTracker:
+    """Cumulative flow of one board round, maintained from the moves of each step.
+
+    ``arrivals[col]`` counts the cards that ever entered column ``col`` this round.
+    Every move goes one column to the right, so the cards currently in a column are
+    ``arrivals[col] - arrivals[col + 1]`` and the CFD band of a column is simply its
+    arrivals series. The engine bumps one counter per move (and feeds the cycle time
+    of every card reaching Done into a t-digest); close_day() stores the counters as
+    that day's CFD row, so serving the diagram never rescans cards or history.
+    """
+
+    def __init__(self, column_count: int, history_days: int = FLOW_HISTORY_DAYS):
+        self.arrivals = [0] * column_count
+        self.days: deque[tuple[int, tuple[int, ...]]] = deque(maxlen=history_days)
+        self.cycle_times = TDigest()
+
+    def close_day(self, day: int):
+        self.days.append((day, tuple(self.arrivals)))
+
+    def rows_since(self, since_day: int = -1) -> list[tuple[int, tuple[int, ...]]]:
+        """CFD rows of the days after ``since_day`` (rows are in day order, so a bisect finds the start)."""
+        start = bisect.bisect_right(self.days, since_day, key=lambda row: row[0])
+        return list(itertools.islice(self.days, start, None))
+
+    def rates(self, window: int = DEFAULT_RATE_WINDOW) -> dict:
+        """Average cards per day entering each column over the last ``window`` recorded days."""
+        if len(self.days) < 2:
+            return {"window_days": 0, "per_column": [0.0] * len(self.arrivals)}
+        last_day, last = self.days[-1]
+        first_day, first = self.days[max(0, len(self.days) - 1 - window)]
+        span = last_day - first_day
+        if span <= 0:
+            return {"window_days": 0, "per_column": [0.0] * len(self.arrivals)}
+        return {"window_days": span, "per_column": [(now - then) / span for now, then in zip(last, first)]}
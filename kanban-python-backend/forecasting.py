@@ -0,0 +1,175 @@
+# kanban-python-backend/forecasting.py
+
+import asyncio
+import itertools
+import math
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+import kanban_engine
+import vector_engine
+from workflow import DEFAULT_WORKFLOW
+
+PROCESS_WORKERS = int(os.environ.get("KANBAN_PROCESS_WORKERS", "0")) or os.cpu_count() or 1
+FORECAST_PERCENTILES = (50, 85, 95)
+FORECAST_METRICS = ("red_card_cycle_time", "throughput", "flow_efficiency")
+
+_process_pool = None
+
+
+# --- Process Pool ---
+def get_process_pool() -> ProcessPoolExecutor:
+    """Shared pool for CPU-bound simulation batches, created on first use."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS)
+    return _process_pool
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+# --- Replications (run inside worker processes) ---
+def run_replication(complexity: dict[str, int], wip_limit: int, red_card_delay_days: int | None,
+                    variability: float, seed: int | None, max_days: int):
+    """Runs one headless round and returns its numeric metrics, or None if it did not finish."""
+    return kanban_engine.simulate_round(complexity, wip_limit, red_card_delay_days, max_days, seed, variability)
+
+def run_replication_chunk(config: dict, seeds: list[int]):
+    # One task per chunk rather than per replication keeps pickling overhead low.
+    return [run_replication(seed=seed, **config) for seed in seeds]
+
+
+# --- Statistics ---
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(results: list[dict | None]) -> dict:
+    completed = [result for result in results if result is not None]
+    summary = {"replications": len(results), "completed": len(completed)}
+    for metric in FORECAST_METRICS:
+        values = sorted(result[metric] for result in completed)
+        stats = {f"p{pct}": percentile(values, pct) for pct in FORECAST_PERCENTILES}
+        stats["mean"] = sum(values) / len(values) if values else 0.0
+        summary[metric] = stats
+    return summary
+
+
+# --- Monte Carlo ---
+def chunk_seeds(replications: int, seed: int, chunks: int) -> list[list[int]]:
+    seeds = [seed + offset for offset in range(replications)]
+    chunk_size = max(1, math.ceil(replications / chunks))
+    return [seeds[start:start + chunk_size] for start in range(0, replications, chunk_size)]
+
+async def run_monte_carlo(config: dict, replications: int, seed: int = 0, executor: Executor | None = None) -> dict:
+    """Runs ``replications`` independent rounds of ``config`` across the process pool.
+
+    ``config`` holds the keyword arguments of run_replication except ``seed``.
+    Replication i uses seed ``seed + i``, so a forecast is reproducible.
+    """
+    executor = executor or get_process_pool()
+    loop = asyncio.get_running_loop()
+    chunks = chunk_seeds(replications, seed, PROCESS_WORKERS * 4)
+    futures = [loop.run_in_executor(executor, run_replication_chunk, config, seeds) for seeds in chunks]
+    results = []
+    for chunk_results in await asyncio.gather(*futures):
+        results.extend(chunk_results)
+    return summarize(results)
+
+
+# --- Parameter Sweep ---
+def expand_values(spec) -> list[int]:
+    """Turns an int, a list of ints or a {"start", "stop", "step"} dict (stop inclusive) into values."""
+    if isinstance(spec, int):
+        return [spec]
+    if isinstance(spec, dict):
+        step = spec.get("step", 1)
+        if step <= 0:
+            raise ValueError("step must be positive")
+        return list(range(spec["start"], spec["stop"] + 1, step))
+    return list(spec)
+
+def sweep_key(wip_limit: int, complexity: dict[str, int]) -> tuple:
+    # Canonical form: column ids as ints, sorted, so equal configurations share one key.
+    return (wip_limit, tuple(sorted((int(col), value) for col, value in complexity.items())))
+
+def build_sweep_grid(wip_limits, complexity_specs: dict) -> list[tuple]:
+    """Unique (wip_limit, complexity) configurations of the grid, as sweep keys in grid order."""
+    # Sweeps run on the default workflow; a key for any other column would only multiply the grid.
+    working = DEFAULT_WORKFLOW.working_columns
+    for col in complexity_specs:
+        if not str(col).isdigit() or int(col) not in working:
+            raise ValueError(f"Column {col} is not a working column (working columns: {', '.join(map(str, working))}).")
+    columns = sorted(complexity_specs, key=int)
+    value_lists = [expand_values(complexity_specs[col]) for col in columns]
+    grid = []
+    seen = set()
+    wip_values = expand_values(wip_limits)
+    if any(wip_limit < 1 for wip_limit in wip_values):
+        raise ValueError("wip_limit must be at least 1; with 0 no card can ever start.")
+    for wip_limit in wip_values:
+        for values in itertools.product(*value_lists):
+            key = sweep_key(wip_limit, dict(zip(columns, values)))
+            if key not in seen:
+                seen.add(key)
+                grid.append(key)
+    return grid
+
+def run_sweep_chunk(keys: list[tuple], red_card_delay_days: int | None, max_days: int):
+    # The whole chunk advances as one batch of boards on the vectorized kernel.
+    configs = [({str(col): value for col, value in complexity_items}, wip_limit) for wip_limit, complexity_items in keys]
+    metrics = vector_engine.simulate_rounds(configs, red_card_delay_days, max_days)
+    return list(zip(keys, metrics))
+
+def sweep_result(key: tuple, metrics: dict | None) -> dict:
+    wip_limit, complexity_items = key
+    result = {"wip_limit": wip_limit, "complexity": {str(col): value for col, value in complexity_items}}
+    if metrics is None:
+        result["finished"] = False
+    else:
+        result["finished"] = True
+        result.update(metrics)
+    return result
+
+def _round_key(key: tuple, red_card_delay_days: int | None, max_days: int):
+    wip_limit, complexity_items = key
+    complexity = {str(col): value for col, value in complexity_items}
+    return kanban_engine.round_key(complexity, wip_limit, red_card_delay_days, max_days)
+
+async def run_sweep(grid: list[tuple], red_card_delay_days: int | None = None, max_days: int = 10000,
+                    executor: Executor | None = None):
+    """Yields one result dict per grid point as soon as it is known.
+
+    The engine is deterministic, so points already known to the engine's round cache
+    (from earlier sweeps, batches or previews) are answered first; the rest run in
+    chunks across the process pool and are yielded in completion order.
+    """
+    pending = []
+    for key in grid:
+        metrics = kanban_engine.get_cached_round(_round_key(key, red_card_delay_days, max_days))
+        if metrics is kanban_engine.MISSING:
+            pending.append(key)
+        else:
+            yield sweep_result(key, metrics)
+    if not pending:
+        return
+
+    executor = executor or get_process_pool()
+    loop = asyncio.get_running_loop()
+    chunk_size = max(1, math.ceil(len(pending) / (PROCESS_WORKERS * 4)))
+    futures = [
+        loop.run_in_executor(executor, run_sweep_chunk, pending[start:start + chunk_size], red_card_delay_days, max_days)
+        for start in range(0, len(pending), chunk_size)
+    ]
+    for future in asyncio.as_completed(futures):
+        for key, metrics in await future:
+            # Worker processes have their own memory, so results are cached here.
+            kanban_engine.cache_round(_round_key(key, red_card_delay_days, max_days), metrics)
+            yield sweep_result(key, metrics)
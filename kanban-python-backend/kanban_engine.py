@@ -1,47 +1,135 @@
 # kanban-python-backend/kanban_engine.py
 
+import functools
+import itertools
+import json
+import logging
+import os
+import random
+import struct
+import threading
 import time
 import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from event_log import DEBUG, INFO, WARNING, EventLog
+from flow_metrics import CYCLE_TIME_QUANTILES, DEFAULT_RATE_WINDOW, FlowTracker
+from round_cache import MISSING, RoundCache, canonical_key
+from dashboard_store import ROUND_COLUMNS as DASHBOARD_EXPORT_COLUMNS, DashboardStore
+from snapshot_store import create_snapshot_store
+from steady_state import CompactRound
+import wire_format
+from workflow import DEFAULT_WORKFLOW, FIRST_STAGE_COLUMN, Workflow, WorkflowError
+
+# Bump whenever a change to the step rules can change the outcome of a round, so
+# cached round results computed under the old rules are no longer used.
+ENGINE_RULES_VERSION = 1
+
+_logger = logging.getLogger("kanban.engine")
 
 # --- Card Class ---
+# Flag bits packed into Card.flags
+CARD_MOVING = 1
+CARD_RED = 2
+
 class Card:
-    def __init__(self, card_id, birth_id, col, x, y, is_red=False):
-        self.card_id = str(card_id)
+    # Slotted: no per-instance __dict__, and the "card-<n>" id string is derived from
+    # birth_id on serialization instead of being stored on every card.
+    __slots__ = (
+        "birth_id", "col", "x", "y", "target_col", "target_x", "flags",
+        "days_on_board", "start_day", "finish_day", "cycle_time",
+        "processing_time", "required_time", "BZ", "WZ",
+    )
+
+    FIELDS = (
+        "id", "birth_id", "col", "x", "y", "target_col", "target_x", "moving",
+        "days_on_board", "start_day", "finish_day", "cycle_time", "is_red",
+        "processing_time", "BZ", "WZ",
+    )
+
+    def __init__(self, birth_id, col, x=0, y=0, is_red=False):
         self.birth_id = birth_id
         self.col = col
         self.x = x
         self.y = y
         self.target_col = None
         self.target_x = None
-        self.moving = False
+        self.flags = CARD_RED if is_red else 0
         self.days_on_board = 0
         self.start_day = 0
         self.finish_day = None
         self.cycle_time = None
-        self.is_red = is_red
         self.processing_time = 0
+        self.required_time = None # Drawn per column when the model runs with variability
         self.BZ = 0
         self.WZ = 0
 
+    @property
+    def card_id(self):
+        return f"card-{self.birth_id}"
+
+    @property
+    def moving(self):
+        return bool(self.flags & CARD_MOVING)
+
+    @moving.setter
+    def moving(self, value):
+        self.flags = self.flags | CARD_MOVING if value else self.flags & ~CARD_MOVING
+
+    @property
+    def is_red(self):
+        return bool(self.flags & CARD_RED)
+
+    @is_red.setter
+    def is_red(self, value):
+        self.flags = self.flags | CARD_RED if value else self.flags & ~CARD_RED
+
+    def to_row(self):
+        """Card values in FIELDS order."""
+        flags = self.flags
+        return (
+            f"card-{self.birth_id}", self.birth_id, self.col, self.x, self.y,
+            self.target_col, self.target_x, bool(flags & CARD_MOVING),
+            self.days_on_board, self.start_day, self.finish_day, self.cycle_time,
+            bool(flags & CARD_RED), self.processing_time, self.BZ, self.WZ,
+        )
+
     def to_dict(self):
-        return {
-            "id": self.card_id,
-            "birth_id": self.birth_id,
-            "col": self.col,
-            "x": self.x,
-            "y": self.y,
-            "target_col": self.target_col,
-            "target_x": self.target_x,
-            "moving": self.moving,
-            "days_on_board": self.days_on_board,
-            "start_day": self.start_day,
-            "finish_day": self.finish_day,
-            "cycle_time": self.cycle_time,
-            "is_red": self.is_red,
-            "processing_time": self.processing_time,
-            "BZ": self.BZ,
-            "WZ": self.WZ
-        }
+        return dict(zip(self.FIELDS, self.to_row()))
+
+DEFAULT_RED_CARD_DELAY_DAYS = 10
+CHANGE_LOG_LENGTH = 256 # Days of card changes kept for delta clients before they must resync
+# Recent dashboard entries kept in memory for stream frames; the full history is in the dashboard store.
+DASHBOARD_MEMORY_ROUNDS = int(os.environ.get("KANBAN_DASHBOARD_MEMORY_ROUNDS", "1000"))
+# KANBAN_CHECK_INVARIANTS=1 recounts the board after every step and raises
+# BoardInvariantError if a running counter drifted (debugging only: it scans every card).
+CHECK_INVARIANTS = os.environ.get("KANBAN_CHECK_INVARIANTS", "0") == "1"
+
+
+class BoardInvariantError(RuntimeError):
+    """Raised by KanbanModel.check_invariants when a running counter disagrees with a recount."""
+
+# --- Step Phase Timing ---
+# Phases of advance_one_simulation_step, in order. The last phase is "refill" on a
+# normal day and "round_end" on the day the red card reaches Done.
+STEP_PHASES = ("red_card", "flow_accounting", "working_columns", "update_positions", "refill", "round_end")
+
+_step_phase_observer = None
+
+def set_step_phase_observer(observer):
+    """Installs observer(phases) called after every step with (phase, seconds) pairs; None disables timing."""
+    global _step_phase_observer
+    _step_phase_observer = observer
+
+def _phase_durations(t0, t1, t2, t3, t4, last_phase):
+    return (
+        ("red_card", t1 - t0),
+        ("flow_accounting", t2 - t1),
+        ("working_columns", t3 - t2),
+        ("update_positions", t4 - t3),
+        (last_phase, time.perf_counter() - t4),
+    )
 
 # --- Helper function (from your original code, assuming it was global) ---
 def get_card_color(card_id):
@@ -49,30 +137,47 @@ def get_card_color(card_id):
 
 # --- KanbanModel Class ---
 class KanbanModel:
-    def __init__(self):
+    def __init__(self, headless: bool = False, seed=None, variability: float = 0.0, workflow: Workflow | None = None):
+        # Headless models run rounds as fast as possible: the event log is disabled and
+        # no animation state (x / target_x positions) is maintained for the frontend.
+        self.headless = headless
+        # With variability > 0 every card draws its own processing time per column around
+        # the configured complexity (standard deviation variability * complexity), from a
+        # generator seeded with `seed`. The default of 0 keeps the rules deterministic.
+        self.seed = seed
+        self.variability = variability
+        self._rng = random.Random(seed)
+        self.events = EventLog()
+        if headless:
+            self.events.disable()
         # All existing attributes as before
-        self.cards: list[Card] = []
+        # Cards are indexed per column. Every column is a FIFO queue in birth_id order
+        # (cards never overtake each other), so the head of a queue is the oldest card.
+        # The Done column doubles as the archive of finished cards and is never scanned
+        # while stepping.
+        self.columns: list[deque[Card]] = []
+        self._moving_counts: list[int] = []
+        self._pending_moves: list[Card] = []
+        # Running counters, updated as cards are added, marked and moved, so neither a
+        # step nor the end of a round looks at the card history: the settled cards per
+        # WIP group (cards marked for a move no longer count) and the round's red card.
+        # Column and Done counts are the queue lengths.
+        self._group_counts: list[int] = []
+        self._red_card: Card | None = None
+        self.debug_invariants = CHECK_INVARIANTS
+        # Delta tracking: every step bumps board_version and records the cards it touched,
+        # so clients can fetch only what changed since the version they last saw.
+        self._track_changes = not headless
+        self.board_version = 0
+        self._resync_version = 0
+        self._changed_cards: list[Card] = []
+        self._change_log: deque[tuple[int, list[Card]]] = deque(maxlen=CHANGE_LOG_LENGTH)
         self.next_card_id = 1
         self.day_count = 0
         self.previous_run_avg = None
         self.wip_limit = 12
 
-        self.column_names = [
-            "Backlog", "Schritt A", "Warten...", "Schritt B",
-            "Warten...", "Schritt C", "Warten...", "Done"
-        ]
-        self.column_x_positions = { # Adjusted for narrower frontend columns
-            0: 50,
-            1: 185,
-            2: 320,
-            3: 455,
-            4: 590,
-            5: 725,
-            6: 860,
-            7: 995
-        }
-        self.complexity_columns = [1, 3, 5]
-        self.working_columns = [1, 3, 5]
+        self._apply_workflow(workflow or DEFAULT_WORKFLOW)
         self.graph_counter = 0
         self.red_card_generated = False
         self.sim_start_time = None
@@ -83,24 +188,70 @@ class KanbanModel:
         self._red_card_reached_end = False
 
         self._current_simulation_parameters = {
-            "complexity": {str(col): 1 for col in self.working_columns},
+            "complexity": self._default_complexity(),
             "wip_limit": self.wip_limit,
             "speed": 1.0
         }
-        self._dashboard_metrics = []
+        self._complexity_by_col: list[int] = []
+        self._group_limits: list[int] = []
+        self._compile_parameters()
+        self._dashboard_metrics = deque(maxlen=DASHBOARD_MEMORY_ROUNDS)
+        # Called as dashboard_sink(round_number, wip_limit, metrics) for every finished
+        # round with the numeric metrics; sessions use it to append to the dashboard store.
+        self.dashboard_sink = None
+        self.last_round_metrics = None
 
         self._red_card_generation_day = -1
-        self._red_card_delay_days = 10
+        self._red_card_delay_days = DEFAULT_RED_CARD_DELAY_DAYS
 
         self._current_round_max_wip_per_column = {col: 0 for col in range(len(self.column_names))}
 
-        print(f"KanbanModel: __init__ called. _is_active initially: {self._is_active}") # DEBUG
+        # Board payloads serialized once per (board_version, day_count) and representation
+        # (wire format, content encoding). The instance tag keeps ETags of a replaced
+        # (e.g. restored) board from colliding.
+        self._instance_tag = uuid.uuid4().hex[:8]
+        self._payload_key = None
+        self._payloads: dict[tuple[str, str | None], tuple[bytes, str | None]] = {}
+
+        # Cumulative flow and cycle times of the current round (see flow_metrics), kept up
+        # to date move by move. Headless rounds have no viewers and skip it.
+        self._flow: FlowTracker | None = None
+
         self.reset_board_state() # This calls reset, which should explicitly set _is_active to False
-        print(f"KanbanModel: __init__ finished. _is_active now: {self._is_active}") # DEBUG
+
+    def _apply_workflow(self, workflow: Workflow):
+        # The board layout comes from a compiled Workflow (see workflow.py); the step loop
+        # only reads its per-column tables.
+        self.workflow = workflow
+        self.column_names = list(workflow.column_names)
+        self.column_x_positions = workflow.x_positions # Adjusted for narrower frontend columns
+        self.complexity_columns = list(workflow.working_columns)
+        self.working_columns = list(workflow.working_columns)
+        self._done_column = workflow.done_column
+
+    def _default_complexity(self):
+        return {str(col): self.workflow.default_complexity[col] for col in self.working_columns}
+
+    def set_workflow(self, workflow: Workflow):
+        """Switches to another board layout and resets the board (only while stopped)."""
+        if self._is_active:
+            return {"status": "already_running", "message": "Stop the simulation before changing the workflow."}
+        self._apply_workflow(workflow)
+        self._current_simulation_parameters["complexity"] = self._default_complexity() # Column ids changed meaning
+        self._compile_parameters()
+        self.reset_board_state()
+        if self.events.info: self.events.emit(INFO, "workflow_changed", columns=workflow.column_count)
+        return {"status": "success", "message": "Workflow updated."}
+
+    @property
+    def cards(self) -> list[Card]:
+        """All cards in birth_id order, Done archive included. Not meant for the step loop."""
+        return [card for column in reversed(self.columns) for card in column]
 
     def reset_board_state(self):
-        print(f"KanbanModel: reset_board_state called. _is_active before: {self._is_active}") # DEBUG
-        self.cards.clear()
+        self.columns = [deque() for _ in self.column_names]
+        self._moving_counts = [0] * len(self.column_names)
+        self._pending_moves = []
         self.day_count = 0
         self.previous_run_avg = None
         self.next_card_id = 1
@@ -110,27 +261,112 @@ class KanbanModel:
         self._red_card_reached_end = False
       #  self._dashboard_metrics.clear()
         self._is_active = False # CRITICAL: Ensure this is explicitly False
-        print(f"KanbanModel: Board state reset and initial backlog created. _is_active after: {self._is_active}") # DEBUG
         self._current_round_max_wip_per_column = {col: 0 for col in range(len(self.column_names))}
-        for i in range(12):
-            self.add_card(col=0, is_red=False)
-        print(f"KanbanModel: Board state reset and initial backlog created. _is_active after: {self._is_active}") # DEBUG
+        self._group_counts = [0] * len(self.workflow.group_names)
+        self._red_card = None
+        if not self.headless: self._flow = FlowTracker(len(self.column_names))
+        self._refill_backlog()
+        if not self.headless: self._close_day()
+        self._mark_resync()
+        if self.events.info: self.events.emit(INFO, "board_reset", backlog=len(self.columns[0]))
 
     def add_card(self, col=0, is_red=False):
-        card_id = f"card-{self.next_card_id}"
+        card = Card(self.next_card_id, col, is_red=is_red)
         self.next_card_id += 1
-        card = Card(card_id, self.next_card_id - 1, col, 0, 0, is_red=is_red)
-        self.cards.append(card)
+        self.columns[col].append(card)
+        group = self.workflow.group_of[col]
+        if group >= 0: self._group_counts[group] += 1
+        if is_red: self._red_card = card
+        if self._track_changes: self._changed_cards.append(card)
+        if self._flow is not None: self._flow.arrivals[col] += 1
         return card
 
+    def _refill_backlog(self):
+        # One bulk append of every missing card (the backlog is in no WIP group).
+        missing = self.workflow.backlog_size - len(self.columns[0])
+        if missing <= 0:
+            return
+        first_id = self.next_card_id
+        cards = [Card(birth_id, 0) for birth_id in range(first_id, first_id + missing)]
+        self.next_card_id = first_id + missing
+        self.columns[0].extend(cards)
+        if self._track_changes: self._changed_cards.extend(cards)
+        if self._flow is not None: self._flow.arrivals[0] += missing
+
+    def _count_board(self):
+        """(moving cards per column, settled cards per WIP group, red card), counted from the cards."""
+        group_of = self.workflow.group_of
+        moving_counts = [0] * len(self.columns)
+        group_counts = [0] * len(self.workflow.group_names)
+        red_card = None
+        for col, column in enumerate(self.columns):
+            for card in column:
+                if card.flags & CARD_MOVING:
+                    moving_counts[col] += 1
+                elif group_of[col] >= 0:
+                    group_counts[group_of[col]] += 1
+                if card.flags & CARD_RED: red_card = card
+        return moving_counts, group_counts, red_card
+
+    def _rebuild_counters(self):
+        # After the columns were replaced wholesale (a restored snapshot).
+        self._moving_counts, self._group_counts, self._red_card = self._count_board()
+
+    def check_invariants(self):
+        """Recounts the whole board and raises BoardInvariantError if a running counter disagrees."""
+        moving_counts, group_counts, red_card = self._count_board()
+        problems = []
+        if moving_counts != self._moving_counts:
+            problems.append(f"moving counts {self._moving_counts} != {moving_counts}")
+        if group_counts != self._group_counts:
+            problems.append(f"WIP group counts {self._group_counts} != {group_counts}")
+        if red_card is not self._red_card:
+            problems.append("red card reference does not match the red card on the board")
+        reached_end = red_card is not None and red_card.col == self._done_column
+        if self._red_card_reached_end != reached_end:
+            problems.append(f"_red_card_reached_end is {self._red_card_reached_end}, the board says {reached_end}")
+        for col, column in enumerate(self.columns):
+            if any(card.col != col for card in column):
+                problems.append(f"column {col} holds cards of another column")
+            if any(a.birth_id > b.birth_id for a, b in zip(column, itertools.islice(column, 1, None))):
+                problems.append(f"column {col} is not in birth_id order")
+        if self._flow is not None and not self._pending_moves:
+            cards_from_here = 0
+            for col in range(len(self.columns) - 1, -1, -1):
+                cards_from_here += len(self.columns[col])
+                if self._flow.arrivals[col] != cards_from_here:
+                    problems.append(f"flow arrivals of column {col} are {self._flow.arrivals[col]}, not {cards_from_here}")
+        if problems:
+            raise BoardInvariantError(f"Day {self.day_count}: " + "; ".join(problems))
+
+    def _commit_changes(self):
+        self.board_version += 1
+        self._change_log.append((self.board_version, self._changed_cards))
+        self._changed_cards = []
+
+    def _mark_resync(self):
+        # Changes that cannot be expressed card by card (a reset) force a full snapshot.
+        self.board_version += 1
+        self._resync_version = self.board_version
+        self._change_log.clear()
+        self._changed_cards = []
+
     def get_group_columns(self, col):
-        if col == 1: return [1, 2]
-        elif col == 3: return [3, 4]
-        elif col == 5: return [5, 6]
-        return []
+        group = self.workflow.group_of[col]
+        return list(self.workflow.group_columns[group]) if group >= 0 else []
+
+    def _head_card(self, col):
+        """Oldest card in a column that is not already marked for a move."""
+        for card in self.columns[col]:
+            if not card.flags & CARD_MOVING:
+                return card
+        return None
+
+    def _settled_count(self, col):
+        return len(self.columns[col]) - self._moving_counts[col]
 
     def is_group_full(self, group_columns):
-        count = sum(1 for c in self.cards if c.col in group_columns and not c.moving)
+        count = sum(self._settled_count(col) for col in group_columns)
         configured_wip_limit = self._current_simulation_parameters.get("wip_limit", self.wip_limit)
         return count >= configured_wip_limit
 
@@ -142,25 +378,30 @@ class KanbanModel:
         return True
 
     def mark_card_for_move(self, card: Card, new_col: int):
-        if new_col == 1 and card.is_red and card.start_day == 0:
-            card.start_day = self.day_count
-        card.target_col = new_col
-        card.target_x = self.column_x_positions[new_col]
-        card.moving = True
-        print(f"KanbanModel: Card {card.birth_id} marked for move to column {new_col}")
+        self._mark_card_for_move_internal(card, new_col)
 
     def set_parameters(self, complexity: dict[str, int], wip_limit: int, speed: float):
         self._current_simulation_parameters["complexity"] = {k:v for k,v in complexity.items()}
         self._current_simulation_parameters["wip_limit"] = wip_limit
         self._current_simulation_parameters["speed"] = speed
         self.wip_limit = wip_limit
-        print(f"KanbanModel: Parameters updated to: {self._current_simulation_parameters}")
+        self._compile_parameters()
+        self._commit_changes() # Lane WIP limits changed, no card did
+        if self.events.info: self.events.emit(INFO, "parameters_updated", parameters=dict(self._current_simulation_parameters))
         return {"status": "parameters_updated"}
 
+    def _compile_parameters(self):
+        # Per-column complexity and per-group WIP limits as plain lists for the step loop,
+        # rebuilt whenever the parameters change.
+        workflow = self.workflow
+        complexity = self._current_simulation_parameters.get("complexity", {})
+        self._complexity_by_col = [complexity.get(str(col), workflow.default_complexity[col])
+                                   for col in range(workflow.column_count)]
+        wip_limit = self._current_simulation_parameters.get("wip_limit", self.wip_limit)
+        self._group_limits = [wip_limit if limit < 0 else limit for limit in workflow.group_limits]
+
     def start(self):
-        print(f"KanbanModel: start() called. _is_active before: {self._is_active}") # DEBUG
         if self._is_active:
-            print("KanbanModel: Simulation already active (from start() check).") # DEBUG
             return {"status": "already_running", "message": "Simulation is already active."}
 
         self.reset_board_state() # Ensure fresh state (this calls reset_board_state, which sets _is_active = False)
@@ -170,16 +411,14 @@ class KanbanModel:
         self._red_card_generation_day = self.day_count + self._red_card_delay_days # Schedule red card
         self.round_counter = 0
 
-        print(f"KanbanModel: Simulation activated. _is_active after start(): {self._is_active}. Red card scheduled for day {self._red_card_generation_day}.") # DEBUG
+        if self.events.info: self.events.emit(INFO, "simulation_started", red_card_day=self._red_card_generation_day)
         return {"status": "success", "message": "Simulation activated."}
 
     def stop(self):
-        print(f"KanbanModel: stop() called. _is_active before: {self._is_active}") # DEBUG
         if not self._is_active:
-            print("KanbanModel: Simulation not active (from stop() check).") # DEBUG
             return {"status": "not_running", "message": "Simulation is not active."}
         self._is_active = False # Set to False to stop
-        print(f"KanbanModel: Simulation stopped. _is_active after stop(): {self._is_active}") # DEBUG
+        if self.events.info: self.events.emit(INFO, "simulation_stopped", day=self.day_count)
         return {"status": "success", "message": "Simulation stopped."}
 
     def is_active(self):
@@ -189,17 +428,35 @@ class KanbanModel:
     def has_red_card_reached_end(self):
         return self._red_card_reached_end
 
+    def _close_day(self):
+        # Runs at the end of every day (and after a reset), so reads have no side effects.
+        self._record_max_wip()
+        self._flow.close_day(self.day_count)
+
+    def _rebuild_flow(self):
+        # Cards never leave the board within a round, so the arrival counters follow from
+        # the columns and the cycle times from the Done archive (used after a restore; the
+        # CFD history then starts at the restore day).
+        flow = FlowTracker(len(self.columns))
+        cards_from_here = 0
+        for col in range(len(self.columns) - 1, -1, -1):
+            cards_from_here += len(self.columns[col])
+            flow.arrivals[col] = cards_from_here
+        for card in self.columns[self._done_column]:
+            if card.cycle_time is not None: flow.cycle_times.add(card.cycle_time)
+        flow.close_day(self.day_count)
+        self._flow = flow
+
+    def _record_max_wip(self):
+        max_wip = self._current_round_max_wip_per_column
+        for col_idx, column in enumerate(self.columns):
+            if len(column) > max_wip.get(col_idx, 0):
+                max_wip[col_idx] = len(column)
+
     def get_current_board_state(self):
         lanes_for_api = []
         for col_idx, col_name in enumerate(self.column_names):
-            lane_cards = [card.to_dict() for card in self.cards if card.col == col_idx]
-            current_lane_wip = len(lane_cards)
-
-            self._current_round_max_wip_per_column[col_idx] = max(
-                self._current_round_max_wip_per_column.get(col_idx, 0),
-                current_lane_wip
-            )
-
+            lane_cards = [card.to_dict() for card in self.columns[col_idx]]
             lanes_for_api.append({
                 "id": f"lane-{col_idx}",
                 "title": col_name,
@@ -209,204 +466,1010 @@ class KanbanModel:
             })
         return {"lanes": lanes_for_api}
 
+    def get_current_board_columns(self):
+        """The board with one array per field instead of one object per card and lane.
+
+        Cards are listed lane by lane in queue order (``lanes["size"]`` cards each), so
+        every card field is a single array; the "card-<n>" id follows from birth_id.
+        """
+        rows = [card.to_row() for column in self.columns for card in column]
+        fields = Card.FIELDS[1:]
+        card_columns = list(zip(*rows))[1:] if rows else [()] * len(fields)
+        max_wip = self._current_round_max_wip_per_column
+        return {
+            "wip_limit": self._current_simulation_parameters.get("wip_limit", self.wip_limit),
+            "lanes": {
+                "title": self.column_names,
+                "size": [len(column) for column in self.columns],
+                "max_wip_in_round": [max_wip.get(col, 0) for col in range(len(self.columns))],
+            },
+            "cards": {field: list(values) for field, values in zip(fields, card_columns)},
+        }
+
+    def get_board_payload(self, fmt: str = wire_format.FORMAT_JSON, encoding: str | None = None):
+        """(body, applied content encoding) of the board in a wire format, built at most once per day.
+
+        The board only changes in a step, a parameter change or a reset, all of which
+        move (board_version, day_count), so repeated reads reuse the cached bytes.
+        """
+        key = (self.board_version, self.day_count)
+        if key != self._payload_key:
+            self._payloads.clear()
+            self._payload_key = key
+        payload = self._payloads.get((fmt, encoding))
+        if payload is None:
+            if encoding is None:
+                board = self.get_current_board_state() if fmt == wire_format.FORMAT_JSON else self.get_current_board_columns()
+                payload = (wire_format.encode(fmt, board), None)
+            else:
+                payload = wire_format.compress(self.get_board_payload(fmt)[0], encoding)
+            self._payloads[(fmt, encoding)] = payload
+        return payload
+
+    def get_current_board_state_json(self) -> bytes:
+        """get_current_board_state() as compact JSON bytes (cached, see get_board_payload)."""
+        return self.get_board_payload()[0]
+
+    def state_etag(self, fmt: str = wire_format.FORMAT_JSON, encoding: str | None = None) -> str:
+        representation = fmt if encoding is None else f"{fmt}-{encoding}"
+        return f'"{self._instance_tag}-{self.board_version}-{self.day_count}-{representation}"'
+
+    def get_board_changes(self, since: int):
+        """Cards changed after board version ``since``, or a full snapshot if the client must resync.
+
+        Delta payloads only carry the changed cards (each with its current column) plus
+        the small per-lane WIP figures, so their size follows the number of moves and
+        not the size of the board.
+        """
+        oldest_logged = self._change_log[0][0] if self._change_log else self.board_version + 1
+        if since < self._resync_version or since > self.board_version or since + 1 < oldest_logged:
+            return {"version": self.board_version, "day": self.day_count, "full": True, **self.get_current_board_state()}
+
+        changed = {}
+        for version, cards in reversed(self._change_log):
+            if version <= since:
+                break
+            for card in cards:
+                changed.setdefault(card.birth_id, card)
+        wip_limit = self._current_simulation_parameters.get("wip_limit", self.wip_limit)
+        return {
+            "version": self.board_version,
+            "day": self.day_count,
+            "full": False,
+            "cards": [changed[birth_id].to_dict() for birth_id in sorted(changed)],
+            "lanes": [
+                {
+                    "id": f"lane-{col_idx}",
+                    "wip_limit": wip_limit,
+                    "max_wip_in_round": self._current_round_max_wip_per_column.get(col_idx, 0),
+                }
+                for col_idx in range(len(self.column_names))
+            ],
+        }
+
+    def get_flow_metrics(self, since_day: int = -1, window: int = DEFAULT_RATE_WINDOW):
+        """CFD rows after ``since_day``, arrival/departure rates and cycle-time quantiles of this round."""
+        flow = self._flow
+        if flow is None:
+            return None
+        rates = flow.rates(window)
+        per_column = rates["per_column"]
+        return {
+            "day": self.day_count,
+            "columns": self.column_names,
+            "cfd": [{"day": day, "arrivals": list(arrivals)} for day, arrivals in flow.rows_since(since_day)],
+            "wip": [len(column) for column in self.columns],
+            "rates": {
+                "window_days": rates["window_days"],
+                "arrival": per_column[FIRST_STAGE_COLUMN], # Cards started per day
+                "departure": per_column[self._done_column], # Cards finished per day
+                "per_column": per_column,
+            },
+            "cycle_time": flow.cycle_times.summary(CYCLE_TIME_QUANTILES),
+        }
+
     def get_dashboard_metrics(self):
-        return self._dashboard_metrics
+        return list(self._dashboard_metrics)
 
     def clear_dashboard_data(self):
         self._dashboard_metrics.clear()
         self.round_counter = 0
-        print("KanbanModel: Dashboard data cleared and round counter reset.")
+        if self.events.info: self.events.emit(INFO, "dashboard_cleared")
 
     def _generate_red_card_internal(self):
         if not self.red_card_generated:
-            backlog_cards = [c for c in self.cards if c.col == 0 and not c.moving]
-            if backlog_cards:
-                backlog_cards.sort(key=lambda x: x.birth_id)
-                red_card = backlog_cards[0]
+            red_card = self._head_card(0)
+            if red_card:
                 red_card.is_red = True
                 red_card.processing_time = 0
                 self.red_card_generated = True
-                print(f"KanbanModel: Red card (ID: {red_card.card_id}) generated at day {self.day_count}.")
+                self._red_card = red_card
+                if self._track_changes: self._changed_cards.append(red_card)
+                if self.events.info: self.events.emit(INFO, "red_card_generated", card=red_card.birth_id, day=self.day_count)
             else:
-                print("KanbanModel: No backlog cards to turn red to meet generation condition.")
+                self.events.emit(WARNING, "red_card_not_generated", day=self.day_count)
 
     def _try_push_card_internal(self, col):
-        own_cards = [c for c in self.cards if c.col == col and not c.moving]
-        if not own_cards:
+        card = self._head_card(col)
+        if card is None:
             return False
-        own_cards.sort(key=lambda x: x.birth_id)
-        card = own_cards[0]
 
-        complexity_factor = self._current_simulation_parameters.get("complexity", {}).get(str(col), 1)
+        complexity_factor = self._complexity_by_col[col]
+        if self.variability:
+            if card.required_time is None:
+                card.required_time = self._draw_processing_time(complexity_factor)
+            complexity_factor = card.required_time
 
         if card.processing_time < complexity_factor:
             card.processing_time += 1
+            if self._track_changes: self._changed_cards.append(card)
             return False
         card.processing_time = 0
+        card.required_time = None
         self._mark_card_for_move_internal(card, col + 1)
         return True
 
+    def _draw_processing_time(self, complexity_factor):
+        spread = self.variability * max(complexity_factor, 1)
+        return max(0, round(self._rng.gauss(complexity_factor, spread)))
+
     def _mark_card_for_move_internal(self, card, new_col):
-        if new_col == 1 and card.is_red and card.start_day == 0:
+        if new_col == FIRST_STAGE_COLUMN:
             card.start_day = self.day_count
         card.target_col = new_col
-        card.target_x = self.column_x_positions[new_col]
-        card.moving = True
-        print(f"KanbanModel: Card {card.birth_id} marked for move to column {new_col}")
+        if not self.headless:
+            card.target_x = self.column_x_positions[new_col]
+        card.flags |= CARD_MOVING
+        self._moving_counts[card.col] += 1
+        group = self.workflow.group_of[card.col]
+        if group >= 0: self._group_counts[group] -= 1
+        self._pending_moves.append(card)
 
     def _update_card_positions_and_state(self):
-        for card in self.cards:
-            if card.moving and card.target_col is not None:
-                old_col = card.col
-                card.col = card.target_col
+        # Only the cards marked this step are touched. A moving card is always at (or
+        # right behind) the head of its queue, and it arrives behind every card already
+        # in the target column, so both queues stay in birth_id order.
+        pending_moves = self._pending_moves
+        self._pending_moves = []
+        pending_moves.sort(key=lambda x: x.birth_id)
+        flow = self._flow
+        group_of = self.workflow.group_of
+        group_counts = self._group_counts
+        for card in pending_moves:
+            old_col = card.col
+            self.columns[old_col].remove(card)
+            self._moving_counts[old_col] -= 1
+            card.col = card.target_col
+            if not self.headless:
                 card.x = card.target_x
-                card.moving = False
-                card.target_x = None
-                card.target_col = None
-                print(f"KanbanModel: Card {card.birth_id} logically moved from {old_col} to {card.col}")
-
-                if card.col == 7:
-                    card.finish_day = self.day_count
-                    card.cycle_time = card.finish_day - card.start_day
-                    print(f"KanbanModel: Card {card.birth_id} finished. Cycle time: {card.cycle_time}")
+            card.flags &= ~CARD_MOVING
+            card.target_x = None
+            card.target_col = None
+            self.columns[card.col].append(card)
+            group = group_of[card.col]
+            if group >= 0: group_counts[group] += 1
+            if self._track_changes: self._changed_cards.append(card)
+            if flow is not None: flow.arrivals[card.col] += 1
+            if self.events.debug: self.events.emit(DEBUG, "card_moved", card=card.birth_id, day=self.day_count, from_col=old_col, to_col=card.col)
+
+            if card.col == self._done_column:
+                card.finish_day = self.day_count
+                card.cycle_time = card.finish_day - card.start_day
+                if flow is not None: flow.cycle_times.add(card.cycle_time)
+                if card.flags & CARD_RED:
+                    self._red_card_reached_end = True
+                if self.events.info: self.events.emit(INFO, "card_finished", card=card.birth_id, day=self.day_count, cycle_time=card.cycle_time)
 
     def advance_one_simulation_step(self):
         if not self._is_active:
-            print("KanbanModel: advance_one_simulation_step called but simulation is not active. Exiting.") # DEBUG
             return
+        # Phase timing costs one None check per phase while no observer is installed.
+        observe_phases = _step_phase_observer
+        if observe_phases is not None: t0 = time.perf_counter()
 
         self.day_count += 1
-        print(f"KanbanModel: Advancing simulation to Day {self.day_count}")
 
         if not self.red_card_generated and self.day_count >= self._red_card_generation_day:
             self._generate_red_card_internal()
+        if observe_phases is not None: t1 = time.perf_counter()
         # 2. Update Flow Efficiency for Red Card (if exists)
-        red_card = next((c for c in self.cards if c.is_red), None)
-        if red_card:
-            if red_card.col in self.working_columns:
+        workflow = self.workflow
+        red_card = self._red_card
+        if red_card is not None and red_card.col != self._done_column:
+            # Work time in a work column; wait time in a wait queue while the work column
+            # before it still holds cards.
+            col = red_card.col
+            if workflow.is_working[col]:
                 red_card.BZ += 1
-            elif red_card.col in [2, 4, 6]:
-                mapping_wait_to_active = {2: 1, 4: 3, 6: 5}
-                preceding_active_col = mapping_wait_to_active.get(red_card.col)
-                if preceding_active_col is not None:
-                    active_cards_in_preceding = any(c for c in self.cards if c.col == preceding_active_col and not c.moving)
-                    if active_cards_in_preceding:
-                        red_card.WZ += 1
-                else:
-                    # If a waiting column without a direct preceding active_col in the map,
-                    # your original logic also incremented WZ. Keep this if it's general wait time.
+            else:
+                owner = workflow.wait_owner[col]
+                if owner >= 0 and self._settled_count(owner) > 0:
                     red_card.WZ += 1
-            print(f"KanbanModel: Red card BZ: {red_card.BZ}, WZ: {red_card.WZ}")
-
-        for col in self.working_columns:
+            if self._track_changes: self._changed_cards.append(red_card)
+        if observe_phases is not None: t2 = time.perf_counter()
+
+        pull_source = workflow.pull_source
+        group_of = workflow.group_of
+        group_limits = self._group_limits
+        group_counts = self._group_counts
+        for col in workflow.working_columns:
             if self._try_push_card_internal(col):
-                pass
-            else:
-                group = self.get_group_columns(col)
-                if not self.is_group_full(group):
-                    prev_col = col - 1
-                    if prev_col >= 0:
-                        prev_cards = [c for c in self.cards if c.col == prev_col and not c.moving]
-                        prev_cards.sort(key=lambda x: x.birth_id)
-                        if prev_cards:
-                            self._mark_card_for_move_internal(prev_cards[0], col)
-
-        final_push_cards = [c for c in self.cards if c.col == 6 and not c.moving]
-        if final_push_cards:
-            final_push_cards.sort(key=lambda x: x.birth_id)
-            self._mark_card_for_move_internal(final_push_cards[0], 7)
-
-        self._update_card_positions_and_state()
-
+                continue
+            source = pull_source[col]
+            if source < 0:
+                continue
+            group = group_of[col]
+            if group_counts[group] < group_limits[group]:
+                prev_card = self._head_card(source)
+                if prev_card:
+                    self._mark_card_for_move_internal(prev_card, col)
+
+        if workflow.final_queue >= 0:
+            final_push_card = self._head_card(workflow.final_queue)
+            if final_push_card:
+                self._mark_card_for_move_internal(final_push_card, self._done_column)
+
+        if observe_phases is not None: t3 = time.perf_counter()
         was_red_card_reached_end_before = self._red_card_reached_end
-        self._red_card_reached_end = any(c for c in self.cards if c.is_red and c.col == 7)
- 
-        # DEBUG: Log the status of the red card stop flag
-        print(f"KanbanModel: Day {self.day_count}. _red_card_reached_end: {self._red_card_reached_end} (was: {was_red_card_reached_end_before}).")
+        self._update_card_positions_and_state()
+        if observe_phases is not None: t4 = time.perf_counter()
 
         if self._red_card_reached_end and not was_red_card_reached_end_before: # If it just reached the end THIS round
-            print(f"KanbanModel: Day {self.day_count}. Red card JUST reached last column. Calling self.stop().") # DEBUG
             self.stop() # This sets _is_active = False, stopping the loop
             self._calculate_and_add_dashboard_entry() # Add final dashboard entry
+            if not self.headless: self._close_day()
+            if self._track_changes: self._commit_changes()
+            if observe_phases is not None: observe_phases(_phase_durations(t0, t1, t2, t3, t4, "round_end"))
+            if self.debug_invariants: self.check_invariants()
             return # Crucial: this return exits the advance_one_simulation_step call.
 
+        self._refill_backlog()
+        if not self.headless: self._close_day()
+        if self._track_changes: self._commit_changes()
+        if observe_phases is not None: observe_phases(_phase_durations(t0, t1, t2, t3, t4, "refill"))
+        if self.debug_invariants: self.check_invariants()
+
+    def run_n_days(self, days: int):
+        """Advances up to ``days`` days without any delay between them.
+
+        Returns the dashboard entry if the round finished within those days, else None.
+        """
+        for _ in range(days):
+            if not self._is_active:
+                break
+            self.advance_one_simulation_step()
+            if self._red_card_reached_end:
+                return self._dashboard_metrics[-1]
+        return None
+
+    def run_until_red_card_done(self, max_days: int = 10000):
+        """Runs the current round to completion and returns its dashboard entry.
+
+        Returns None if the red card has not reached Done after ``max_days`` days
+        (for example with a WIP limit of 0 nothing is ever pulled).
+        """
+        if not self._is_active:
+            self.start()
+        return self.run_n_days(max_days)
 
+    def _compute_round_metrics(self):
+        """Numeric figures of the round that just finished (the dashboard shows them formatted)."""
+        done_column = self._done_column
+        in_progress_count = sum(len(self.columns[col]) for col in range(1, done_column))
+        done_count = len(self.columns[done_column])
 
-        backlog_cards = [c for c in self.cards if c.col == 0]
-        while len(backlog_cards) < 12:
-            self.add_card(col=0)
-            backlog_cards = [c for c in self.cards if c.col == 0]
-
-    def _calculate_and_add_dashboard_entry(self):
-        self.round_counter += 1
-        print("KanbanModel: Calculating dashboard entry for round:", self.round_counter)
-
-        in_progress_count = sum(1 for c in self.cards if c.col not in (0, 7))
-        done_count = sum(1 for c in self.cards if c.col == 7)
-
-        red_card_cycle_time = next((c.cycle_time for c in self.cards if c.is_red and c.cycle_time is not None), 0)
+        red_card = self._red_card
+        red_card_cycle_time = red_card.cycle_time if red_card is not None and red_card.cycle_time is not None else 0
 
         throughput = done_count / red_card_cycle_time if red_card_cycle_time != 0 else 0
 
         flow_efficiency = 0
-        red_card = next((c for c in self.cards if c.is_red), None)
         if red_card:
             total_time = red_card.BZ + red_card.WZ
             if total_time > 0:
                 flow_efficiency = (red_card.BZ / total_time) * 100
 
-        dashboard_entry = {
-            "round": self.round_counter,
-            "wip_limit": self._current_simulation_parameters.get("wip_limit", self.wip_limit),
-            "red_card_cycle_time": f"{red_card_cycle_time:.2f}",
-            "flow_efficiency": f"{flow_efficiency:.2f}%",
+        return {
+            "days": self.day_count,
+            "red_card_cycle_time": red_card_cycle_time,
+            "flow_efficiency": flow_efficiency,
             "in_progress": in_progress_count,
             "done": done_count,
-            "throughput": f"{throughput:.2f}"
+            "throughput": throughput,
         }
+
+    def _calculate_and_add_dashboard_entry(self):
+        self.round_counter += 1
+        metrics = self._compute_round_metrics()
+        self.last_round_metrics = metrics
+
+        wip_limit = self._current_simulation_parameters.get("wip_limit", self.wip_limit)
+        dashboard_entry = format_dashboard_entry(self.round_counter, wip_limit, metrics)
         self._dashboard_metrics.append(dashboard_entry)
-        print(f"KanbanModel: Dashboard entry added: {dashboard_entry}")
+        if self.dashboard_sink is not None:
+            try:
+                self.dashboard_sink(self.round_counter, wip_limit, metrics)
+            except Exception:
+                # The round still counts on the board; only its persistent history entry is lost.
+                _logger.exception("Storing round %d in the dashboard history failed.", self.round_counter)
+        if self.events.info: self.events.emit(INFO, "round_finished", day=self.day_count, **dashboard_entry)
     # >>> CRITICAL: ENSURE THIS METHOD IS PRESENT INSIDE THE KanbanModel CLASS <<<
     def get_simulation_speed(self):
         """Returns the current configured simulation speed from model's parameters."""
         return self._current_simulation_parameters.get("speed", 1.0)
     # >>> END CRITICAL SECTION <<<
 
+    def to_snapshot(self) -> bytes:
+        return encode_snapshot(self)
+
+    @classmethod
+    def from_snapshot(cls, data: bytes, headless: bool = False) -> "KanbanModel":
+        return decode_snapshot(data, headless)
+
+
+# --- Snapshots ---
+# Binary layout (little endian):
+#   header     SNAPSHOT_HEADER: magic, format version, rules version, state flags, day,
+#              next card id, round counter, red card day and delay, length of the JSON blob,
+#              number of columns
+#   columns    one uint32 card count per column
+#   JSON blob  parameters, dashboard, per-round max WIP, the workflow definition (for
+#              other than the default board) and other rarely changing state
+#   card table SNAPSHOT_CARD per card, column by column in queue order
+# Snapshots are taken between two days, when no card is marked as moving and every
+# target_col / target_x is None, so those fields are not stored.
+SNAPSHOT_MAGIC = b"KBS1"
+SNAPSHOT_FORMAT_VERSION = 3
+SNAPSHOT_HEADER = struct.Struct("<4sHHHIIIiiIH")
+SNAPSHOT_HEADER_V1 = struct.Struct("<4sHHHIIIiiI") # Format 1 had no column count: always the default board
+# x and y are int32: on the widest workflows (MAX_COLUMNS) x grows past an int16.
+SNAPSHOT_CARD = struct.Struct("<IBBiiIiiiiiii")
+SNAPSHOT_CARD_V2 = struct.Struct("<IBBhhIiiiiiii") # Formats 1 and 2 stored x and y as int16
+SNAPSHOT_NONE = -1 # Stored for finish_day, cycle_time and required_time when they are None
+
+# State flag bits of the snapshot header
+SNAPSHOT_ACTIVE = 1
+SNAPSHOT_RED_CARD_GENERATED = 2
+SNAPSHOT_RED_CARD_REACHED_END = 4
+
+
+class SnapshotError(ValueError):
+    """Raised for data that is not a snapshot this engine can restore."""
+
+
+def encode_snapshot(model: KanbanModel) -> bytes:
+    state = {
+        "parameters": model._current_simulation_parameters,
+        "wip_limit": model.wip_limit,
+        "dashboard": list(model._dashboard_metrics),
+        "last_round_metrics": model.last_round_metrics,
+        "max_wip": model._current_round_max_wip_per_column,
+        "board_version": model.board_version,
+        "sim_start_time": model.sim_start_time,
+        "variability": model.variability,
+        "seed": model.seed,
+    }
+    if model.workflow != DEFAULT_WORKFLOW:
+        state["workflow"] = model.workflow.to_definition()
+    if model.variability:
+        state["rng_state"] = model._rng.getstate()
+    blob = json.dumps(state, separators=(",", ":")).encode()
+    flags = ((SNAPSHOT_ACTIVE if model._is_active else 0)
+             | (SNAPSHOT_RED_CARD_GENERATED if model.red_card_generated else 0)
+             | (SNAPSHOT_RED_CARD_REACHED_END if model._red_card_reached_end else 0))
+    parts = [
+        SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, ENGINE_RULES_VERSION, flags, model.day_count,
+            model.next_card_id, model.round_counter, model._red_card_generation_day,
+            model._red_card_delay_days, len(blob), len(model.columns),
+        ),
+        struct.pack(f"<{len(model.columns)}I", *(len(column) for column in model.columns)),
+        blob,
+    ]
+    pack = SNAPSHOT_CARD.pack
+    for column in model.columns:
+        for card in column:
+            parts.append(pack(
+                card.birth_id, card.col, card.flags & ~CARD_MOVING, card.x, card.y, card.days_on_board,
+                card.start_day,
+                SNAPSHOT_NONE if card.finish_day is None else card.finish_day,
+                SNAPSHOT_NONE if card.cycle_time is None else card.cycle_time,
+                card.processing_time,
+                SNAPSHOT_NONE if card.required_time is None else card.required_time,
+                card.BZ, card.WZ,
+            ))
+    return b"".join(parts)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _read_snapshot_state(state) -> dict:
+    """Checks the JSON blob of a snapshot; its fields in the types the model uses, or SnapshotError."""
+    try:
+        parameters = state["parameters"]
+        complexity = parameters["complexity"]
+        if not (isinstance(complexity, dict) and all(type(value) is int for value in complexity.values())
+                and type(parameters["wip_limit"]) is int and _is_number(parameters["speed"])):
+            raise SnapshotError("Snapshot has malformed simulation parameters.")
+        if type(state["wip_limit"]) is not int or type(state["board_version"]) is not int:
+            raise SnapshotError("Snapshot has a malformed WIP limit or board version.")
+        if not isinstance(state["dashboard"], list) or not all(isinstance(entry, dict) for entry in state["dashboard"]):
+            raise SnapshotError("Snapshot has a malformed dashboard.")
+        if state["last_round_metrics"] is not None and not isinstance(state["last_round_metrics"], dict):
+            raise SnapshotError("Snapshot has malformed round metrics.")
+        max_wip = {int(col): value for col, value in state["max_wip"].items()}
+        if not all(type(value) is int for value in max_wip.values()):
+            raise SnapshotError("Snapshot has malformed max WIP counts.")
+        if state["sim_start_time"] is not None and not _is_number(state["sim_start_time"]):
+            raise SnapshotError("Snapshot has a malformed start time.")
+        if not _is_number(state["variability"]) or state["variability"] < 0:
+            raise SnapshotError("Snapshot has a malformed variability.")
+        if state["seed"] is not None and not isinstance(state["seed"], (int, float, str)):
+            raise SnapshotError("Snapshot has a malformed seed.")
+        rng_state = None
+        if "rng_state" in state:
+            version, internal, gauss_next = state["rng_state"]
+            rng_state = (version, tuple(internal), gauss_next)
+            random.Random().setstate(rng_state) # Rejects a malformed generator state
+    except (KeyError, TypeError, AttributeError, ValueError) as exc:
+        if isinstance(exc, SnapshotError): raise
+        raise SnapshotError("Snapshot state is incomplete or malformed.") from exc
+    return {**state, "max_wip": max_wip, "rng_state": rng_state}
+
+
+def decode_snapshot(data: bytes, headless: bool = False) -> KanbanModel:
+    try:
+        (magic, format_version, rules_version, flags, day_count, next_card_id, round_counter,
+         red_card_day, red_card_delay, blob_length) = SNAPSHOT_HEADER_V1.unpack_from(data)
+        if format_version >= 2:
+            column_count = SNAPSHOT_HEADER.unpack_from(data)[-1]
+            offset = SNAPSHOT_HEADER.size
+        else:
+            column_count = DEFAULT_WORKFLOW.column_count
+            offset = SNAPSHOT_HEADER_V1.size
+    except struct.error as exc:
+        raise SnapshotError("Snapshot is truncated.") from exc
+    if magic != SNAPSHOT_MAGIC or format_version not in (1, 2, SNAPSHOT_FORMAT_VERSION):
+        raise SnapshotError("Not a snapshot of this format version.")
+    if rules_version != ENGINE_RULES_VERSION:
+        raise SnapshotError(f"Snapshot was taken under engine rules version {rules_version}, not {ENGINE_RULES_VERSION}.")
+    card_struct = SNAPSHOT_CARD if format_version == SNAPSHOT_FORMAT_VERSION else SNAPSHOT_CARD_V2
+
+    try:
+        column_lengths = struct.unpack_from(f"<{column_count}I", data, offset)
+        offset += 4 * column_count
+        state = _read_snapshot_state(json.loads(data[offset:offset + blob_length]))
+        offset += blob_length
+        expected_size = offset + card_struct.size * sum(column_lengths)
+        if len(data) != expected_size:
+            raise SnapshotError(f"Snapshot has {len(data)} bytes, expected {expected_size}.")
+        workflow = Workflow.from_definition(state["workflow"]) if "workflow" in state else DEFAULT_WORKFLOW
+        if workflow.column_count != column_count:
+            raise SnapshotError(f"Snapshot has {column_count} columns, its workflow {workflow.column_count}.")
+    except (struct.error, ValueError, UnicodeDecodeError) as exc: # WorkflowError is a ValueError
+        if isinstance(exc, SnapshotError): raise
+        raise SnapshotError("Snapshot is corrupt.") from exc
+
+    model = KanbanModel(headless=headless, workflow=workflow)
+
+    columns = []
+    rows = card_struct.iter_unpack(memoryview(data)[offset:])
+    for length in column_lengths:
+        column = deque()
+        for _ in range(length):
+            (birth_id, col, card_flags, x, y, days_on_board, start_day, finish_day, cycle_time,
+             processing_time, required_time, bz, wz) = next(rows)
+            if col != len(columns):
+                raise SnapshotError(f"Card {birth_id} is stored in column {len(columns)} but claims column {col}.")
+            card = Card(birth_id, col, x, y)
+            card.flags = card_flags
+            card.days_on_board = days_on_board
+            card.start_day = start_day
+            card.finish_day = None if finish_day == SNAPSHOT_NONE else finish_day
+            card.cycle_time = None if cycle_time == SNAPSHOT_NONE else cycle_time
+            card.processing_time = processing_time
+            card.required_time = None if required_time == SNAPSHOT_NONE else required_time
+            card.BZ = bz
+            card.WZ = wz
+            column.append(card)
+        columns.append(column)
+
+    model.columns = columns
+    model._pending_moves = []
+    model._rebuild_counters()
+    model.day_count = day_count
+    model.next_card_id = next_card_id
+    model.round_counter = round_counter
+    model._red_card_generation_day = red_card_day
+    model._red_card_delay_days = red_card_delay
+    model._is_active = bool(flags & SNAPSHOT_ACTIVE)
+    model.red_card_generated = bool(flags & SNAPSHOT_RED_CARD_GENERATED)
+    model._red_card_reached_end = bool(flags & SNAPSHOT_RED_CARD_REACHED_END)
+    model._current_simulation_parameters = state["parameters"]
+    model.wip_limit = state["wip_limit"]
+    model._compile_parameters()
+    if not headless: model._rebuild_flow()
+    model._dashboard_metrics = deque(state["dashboard"], maxlen=DASHBOARD_MEMORY_ROUNDS)
+    model.last_round_metrics = state["last_round_metrics"]
+    model._current_round_max_wip_per_column = state["max_wip"]
+    model.sim_start_time = state["sim_start_time"]
+    model.variability = state["variability"]
+    model.seed = state["seed"]
+    if state["rng_state"] is not None:
+        model._rng.setstate(state["rng_state"])
+    # Delta clients of the old process cannot continue their version chain here.
+    model.board_version = state["board_version"]
+    model._mark_resync()
+    return model
+
+
+def format_dashboard_entry(round_number: int, wip_limit: int, metrics: dict):
+    return {
+        "round": round_number,
+        "wip_limit": wip_limit,
+        "red_card_cycle_time": f"{metrics['red_card_cycle_time']:.2f}",
+        "flow_efficiency": f"{metrics['flow_efficiency']:.2f}%",
+        "in_progress": metrics["in_progress"],
+        "done": metrics["done"],
+        "throughput": f"{metrics['throughput']:.2f}"
+    }
+
+
+# --- Headless Rounds ---
+# Deterministic rounds skip the periodic part of a round (see steady_state.CompactRound)
+# unless KANBAN_FAST_FORWARD=0; the results are the same as stepping every day.
+FAST_FORWARD_ROUNDS = os.environ.get("KANBAN_FAST_FORWARD", "1") == "1"
+
+def simulate_round(complexity: dict[str, int], wip_limit: int, red_card_delay_days: int | None = None,
+                   max_days: int = 10000, seed=None, variability: float = 0.0, workflow: Workflow | None = None,
+                   fast_forward: bool | None = None):
+    """Runs one headless round and returns its numeric metrics, or None if it did not finish."""
+    model = KanbanModel(headless=True, seed=seed, variability=variability, workflow=workflow)
+    model.set_parameters(complexity, wip_limit, 0.0)
+    if red_card_delay_days is not None:
+        model._red_card_delay_days = red_card_delay_days
+    if fast_forward is None: fast_forward = FAST_FORWARD_ROUNDS
+    if fast_forward and not variability:
+        model.start()
+        return CompactRound.from_model(model).run(max_days)
+    if model.run_until_red_card_done(max_days) is None:
+        return None
+    return model.last_round_metrics
+
+def round_key(complexity: dict[str, int], wip_limit: int, red_card_delay_days: int | None = None,
+              max_days: int = 10000, seed=None, variability: float = 0.0, workflow: Workflow | None = None):
+    """Canonical cache key of a round, or None if the round is not reproducible."""
+    if variability and seed is None:
+        return None
+    if red_card_delay_days is None:
+        red_card_delay_days = DEFAULT_RED_CARD_DELAY_DAYS
+    return canonical_key(
+        rules=ENGINE_RULES_VERSION,
+        complexity={str(int(col)): value for col, value in complexity.items()},
+        wip_limit=wip_limit,
+        red_card_delay_days=red_card_delay_days,
+        max_days=max_days,
+        seed=seed if variability else None,
+        variability=variability,
+        workflow=None if workflow is None or workflow == DEFAULT_WORKFLOW else workflow.key,
+    )
+
+_round_cache = RoundCache(maxsize=int(os.environ.get("KANBAN_ROUND_CACHE_SIZE", "4096")))
+
+def get_cached_round(key: str | None):
+    """Cached metrics for a round key, or MISSING (None is a valid result: the round never finished)."""
+    if key is None:
+        return MISSING
+    return _round_cache.get(key)
+
+def cache_round(key: str | None, metrics: dict | None):
+    if key is not None:
+        _round_cache.put(key, metrics)
+
+def simulate_round_cached(complexity: dict[str, int], wip_limit: int, red_card_delay_days: int | None = None,
+                          max_days: int = 10000, seed=None, variability: float = 0.0, workflow: Workflow | None = None):
+    key = round_key(complexity, wip_limit, red_card_delay_days, max_days, seed, variability, workflow)
+    metrics = get_cached_round(key)
+    if metrics is MISSING:
+        metrics = simulate_round(complexity, wip_limit, red_card_delay_days, max_days, seed, variability, workflow)
+        cache_round(key, metrics)
+    return metrics
+
+
+# --- Session Registry ---
+DEFAULT_SESSION_ID = "default"
+
+
+class SessionLimitError(RuntimeError):
+    """Raised when a new session is requested but the registry is full of active sessions."""
+
+
+class SimulationSession:
+    def __init__(self, session_id: str, model: KanbanModel):
+        self.session_id = session_id
+        self.model = model
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+        # Engine work runs in worker threads; the step and every reader of this board
+        # hold the lock, so nobody sees a half-applied day.
+        self.lock = threading.Lock()
+
+    def touch(self):
+        self.last_access = time.monotonic()
+
+
+class SessionRegistry:
+    """Keeps one independent KanbanModel per session id.
+
+    Sessions are kept in least-recently-used order. Idle sessions expire after
+    ``idle_ttl_seconds``; ``max_sessions`` caps how many boards (and therefore how
+    much memory) a single worker holds. When the cap is reached the least recently
+    used inactive session is evicted to make room. The registry itself is guarded by
+    a lock because sessions are looked up from engine worker threads. A session's own
+    lock is never taken while holding the registry lock: a step can hold a session
+    lock for a while, and every lookup would queue up behind it.
+    """
+
+    def __init__(self, max_sessions: int = 500, idle_ttl_seconds: float = 3600.0, model_factory=None, model_setup=None):
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._model_factory = model_factory or KanbanModel
+        self._model_setup = model_setup # Called as model_setup(session_id, model) for every new or restored board
+        self._sessions: OrderedDict[str, SimulationSession] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def session_ids(self):
+        with self._lock:
+            return list(self._sessions)
+
+    def create(self, session_id: str | None = None) -> SimulationSession:
+        if session_id is None:
+            session_id = uuid.uuid4().hex
+        victim = None
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.touch()
+                self._sessions.move_to_end(session_id)
+                return session
+            if len(self._sessions) >= self.max_sessions:
+                victim = self._pop_for_capacity()
+            model = self._model_factory()
+            if self._model_setup is not None: self._model_setup(session_id, model)
+            session = SimulationSession(session_id, model)
+            self._sessions[session_id] = session
+        if victim is not None: self._retire(victim)
+        return session
+
+    def get(self, session_id: str, create: bool = True) -> SimulationSession | None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.touch()
+                self._sessions.move_to_end(session_id)
+                return session
+        return self.create(session_id) if create else None
+
+    def restore(self, session_id: str, model: KanbanModel) -> SimulationSession:
+        """Installs ``model`` (e.g. decoded from a snapshot) as the session's board."""
+        if self._model_setup is not None: self._model_setup(session_id, model)
+        victim = None
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                if len(self._sessions) >= self.max_sessions:
+                    victim = self._pop_for_capacity()
+                session = SimulationSession(session_id, model)
+                self._sessions[session_id] = session
+            else:
+                session.touch()
+                self._sessions.move_to_end(session_id)
+        if victim is not None: self._retire(victim)
+        if session.model is not model:
+            with session.lock:
+                session.model.stop()
+                session.model = model
+        return session
+
+    def peek(self, session_id: str) -> SimulationSession | None:
+        """Looks a session up without counting as an access (used by the simulation loop)."""
+        return self._sessions.get(session_id)
+
+    def evict(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._retire(session)
+        return True
 
-# --- Global instance of your Kanban Engine ---
-_kanban_model = KanbanModel()
+    @staticmethod
+    def _retire(session: SimulationSession):
+        # Called without the registry lock: waits for a step of this session to finish.
+        with session.lock:
+            session.model.stop()
+
+    def evict_idle(self, now: float | None = None) -> list[str]:
+        """Evicts every session that has not been accessed within the idle TTL."""
+        if now is None:
+            now = time.monotonic()
+        expired = []
+        with self._lock:
+            # Sessions are in LRU order, so we can stop at the first fresh one.
+            for session_id, session in self._sessions.items():
+                if now - session.last_access < self.idle_ttl_seconds:
+                    break
+                expired.append(session_id)
+        for session_id in expired:
+            self.evict(session_id)
+        return expired
+
+    def _pop_for_capacity(self) -> SimulationSession:
+        """Removes the least recently used inactive session (registry lock held); the caller retires it."""
+        for session_id, session in self._sessions.items():
+            if not session.model.is_active():
+                return self._sessions.pop(session_id)
+        raise SessionLimitError(f"Session limit of {self.max_sessions} active simulations reached.")
+
+
+# --- Global session registry of your Kanban Engine ---
+# Finished rounds of every session are appended to the dashboard store (SQLite at
+# KANBAN_DASHBOARD_DB), which outlives sessions and restarts.
+_dashboard_store = DashboardStore()
+
+def _attach_dashboard_store(session_id: str, model: KanbanModel):
+    model.dashboard_sink = functools.partial(_dashboard_store.append, session_id)
+
+_sessions = SessionRegistry(
+    max_sessions=int(os.environ.get("KANBAN_MAX_SESSIONS", "500")),
+    idle_ttl_seconds=float(os.environ.get("KANBAN_SESSION_TTL_SECONDS", "3600")),
+    model_setup=_attach_dashboard_store,
+)
+
+@contextmanager
+def _locked_model(session_id: str, create: bool = True):
+    """Yields the session's model while holding its lock (None if the session is gone and create is False)."""
+    session = _sessions.get(session_id) if create else _sessions.peek(session_id)
+    if session is None:
+        yield None
+        return
+    with session.lock:
+        yield session.model
+
+_snapshot_store = create_snapshot_store()
 
 # --- Functions to be called by FastAPI (main.py) ---
+# main.py runs these in engine worker threads. Each call holds the session lock for
+# its whole duration, so a reader always sees the board between two days.
 def initialize_engine_api():
-    _kanban_model.reset_board_state()
+    with _locked_model(DEFAULT_SESSION_ID) as model:
+        model.reset_board_state()
     print("kanban_engine.py: Module initialized and board reset.")
 
-def set_simulation_parameters_api(complexity: dict[str, int], wip_limit: int, speed: float):
-    _kanban_model.set_parameters(complexity, wip_limit, speed)
-
-def start_simulation_api():
-    _kanban_model.start()
-
-def stop_simulation_api():
-    _kanban_model.stop()
- 
-def is_simulation_active_api():
-    return _kanban_model.is_active()
-
-def has_red_card_reached_end_api():
-    return _kanban_model.has_red_card_reached_end()
-
-def get_current_board_state_api():
-    return _kanban_model.get_current_board_state()
-
-def get_dashboard_metrics_api():
-    return _kanban_model.get_dashboard_metrics()
-
-def clear_dashboard_data_api():
-    _kanban_model.clear_dashboard_data()
-
-def advance_simulation_step_api():
-    _kanban_model.advance_one_simulation_step()
+def create_session_api(session_id: str | None = None):
+    return _sessions.create(session_id).session_id
+
+def evict_session_api(session_id: str):
+    return _sessions.evict(session_id)
+
+def evict_idle_sessions_api():
+    return _sessions.evict_idle()
+
+def get_session_count_api():
+    return len(_sessions)
+
+def set_simulation_parameters_api(complexity: dict[str, int], wip_limit: int, speed: float, session_id: str = DEFAULT_SESSION_ID):
+    with _locked_model(session_id) as model:
+        model.set_parameters(complexity, wip_limit, speed)
+
+def start_simulation_api(session_id: str = DEFAULT_SESSION_ID):
+    with _locked_model(session_id) as model:
+        model.start()
+
+def stop_simulation_api(session_id: str = DEFAULT_SESSION_ID):
+    with _locked_model(session_id) as model:
+        model.stop()
+
+def is_simulation_active_api(session_id: str = DEFAULT_SESSION_ID):
+    # A single flag read, safe without the lock (and cheap enough for the event loop).
+    session = _sessions.peek(session_id)
+    return session is not None and session.model.is_active()
+
+def has_red_card_reached_end_api(session_id: str = DEFAULT_SESSION_ID):
+    with _locked_model(session_id) as model:
+        return model.has_red_card_reached_end()
+
+def get_current_board_state_api(session_id: str = DEFAULT_SESSION_ID):
+    with _locked_model(session_id) as model:
+        return model.get_current_board_state()
+
+def get_board_payload_api(session_id: str = DEFAULT_SESSION_ID, fmt: str = wire_format.FORMAT_JSON, encoding: str | None = None):
+    """(ETag, body, applied content encoding) of the session's board; cached until the next change."""
+    with _locked_model(session_id) as model:
+        body, applied_encoding = model.get_board_payload(fmt, encoding)
+        return model.state_etag(fmt, applied_encoding), body, applied_encoding
+
+def get_board_frame_json_api(session_id: str = DEFAULT_SESSION_ID, create: bool = False):
+    """Board frame for stream viewers as JSON text, built around the cached board bytes.
+
+    Publishing must not revive an evicted session, so by default this returns None for
+    a session that is gone; a new viewer passes ``create=True`` to get its real board.
+    """
+    with _locked_model(session_id, create=create) as model:
+        if model is None:
+            return None
+        state_json = model.get_current_board_state_json().decode()
+        running = "true" if model.is_active() else "false"
+        return f'{{"day":{model.day_count},"is_running":{running},{state_json[1:]}'
+
+def get_workflow_api(session_id: str = DEFAULT_SESSION_ID):
+    with _locked_model(session_id) as model:
+        return model.workflow.describe()
+
+def set_workflow_api(definition: dict, session_id: str = DEFAULT_SESSION_ID):
+    """Compiles ``definition`` and installs it on the session's board. Raises WorkflowError."""
+    workflow = Workflow.from_definition(definition)
+    with _locked_model(session_id) as model:
+        result = model.set_workflow(workflow)
+        result["workflow"] = model.workflow.describe()
+        return result
 
-def get_simulation_speed_api():
-    return _kanban_model.get_simulation_speed()
\ No newline at end of file
+def get_board_changes_api(session_id: str = DEFAULT_SESSION_ID, since: int = 0):
+    with _locked_model(session_id) as model:
+        changes = model.get_board_changes(since)
+        changes["is_running"] = model.is_active()
+        return changes
+
+def get_flow_metrics_api(session_id: str = DEFAULT_SESSION_ID, since_day: int = -1, window: int = DEFAULT_RATE_WINDOW):
+    with _locked_model(session_id) as model:
+        return model.get_flow_metrics(since_day, window)
+
+def clear_dashboard_data_api(session_id: str = DEFAULT_SESSION_ID):
+    with _locked_model(session_id) as model:
+        model.clear_dashboard_data()
+        _dashboard_store.clear(session_id)
+
+def _dashboard_entries(rows: list[dict]) -> list[dict]:
+    entries = []
+    for row in rows:
+        entry = format_dashboard_entry(row["round"], row["wip_limit"], row)
+        entry["position"] = row["position"]
+        entries.append(entry)
+    return entries
+
+def get_dashboard_history_api(session_id: str = DEFAULT_SESSION_ID, since_round: int = 0, limit: int | None = None):
+    """Stored rounds after position ``since_round`` as dashboard entries (plus their position)."""
+    return _dashboard_entries(_dashboard_store.rounds(session_id, since_round, limit))
+
+def get_recent_dashboard_api(session_id: str = DEFAULT_SESSION_ID, count: int = DASHBOARD_MEMORY_ROUNDS):
+    """The last ``count`` stored rounds as dashboard entries, as pushed to stream viewers.
+
+    Read from the store rather than the model, so viewers also see rounds finished
+    before a restart or by another worker process.
+    """
+    return _dashboard_entries(_dashboard_store.latest_rounds(session_id, count))
+
+def get_dashboard_columns_api(session_id: str = DEFAULT_SESSION_ID, since_round: int = 0, limit: int | None = None):
+    """Stored rounds after position ``since_round`` with numeric values, one array per field."""
+    return wire_format.columns_from_rows(_dashboard_store.rounds(session_id, since_round, limit), DASHBOARD_EXPORT_COLUMNS)
+
+def iter_dashboard_history_api(session_id: str = DEFAULT_SESSION_ID, since_round: int = 0):
+    """Numeric rows of the stored rounds, read page by page (for streaming exports)."""
+    return _dashboard_store.iter_rounds(session_id, since_round)
+
+def close_dashboard_store_api():
+    _dashboard_store.close()
+
+def advance_simulation_step_api(session_id: str = DEFAULT_SESSION_ID):
+    """Advances the session by one day; returns whether it is still running afterwards."""
+    with _locked_model(session_id, create=False) as model:
+        if model is None:
+            return False
+        model.advance_one_simulation_step()
+        return model.is_active()
+
+def advance_sessions_api(session_ids: list[str]):
+    """Advances each session by one day; returns (session_id, still_running, speed) per session."""
+    results = []
+    for session_id in session_ids:
+        with _locked_model(session_id, create=False) as model:
+            if model is None:
+                results.append((session_id, False, 0.0))
+                continue
+            try:
+                model.advance_one_simulation_step()
+            except Exception:
+                # Only the failing session stops (its next start resets the board); the
+                # rest of the batch still advances.
+                _logger.exception("Step of session %s failed; stopping its simulation.", session_id)
+                model._is_active = False
+                model.events.emit(WARNING, "step_failed", day=model.day_count)
+                results.append((session_id, False, 0.0))
+                continue
+            results.append((session_id, model.is_active(), model.get_simulation_speed()))
+    return results
+
+def get_events_api(session_id: str = DEFAULT_SESSION_ID, since: int = 0):
+    with _locked_model(session_id) as model:
+        return model.events.since(since)
+
+def take_unshipped_events_api():
+    """Collects the not yet shipped event records of every session as (session_id, records) pairs."""
+    batches = []
+    for session_id in _sessions.session_ids():
+        with _locked_model(session_id, create=False) as model:
+            records = model.events.take_unshipped() if model is not None else []
+        if records:
+            batches.append((session_id, records))
+    return batches
+
+def get_session_snapshot_api(session_id: str = DEFAULT_SESSION_ID):
+    """Binary snapshot of the session's board, or None if the session does not exist."""
+    with _locked_model(session_id, create=False) as model:
+        return model.to_snapshot() if model is not None else None
+
+def restore_session_snapshot_api(session_id: str, data: bytes):
+    """Replaces (or creates) the session from snapshot bytes; returns whether it is running. Raises SnapshotError."""
+    model = KanbanModel.from_snapshot(data)
+    _sessions.restore(session_id, model)
+    return model.is_active()
+
+def save_session_api(session_id: str = DEFAULT_SESSION_ID):
+    """Writes the session's snapshot to the snapshot store; returns its size, or None if there is no session."""
+    data = get_session_snapshot_api(session_id)
+    if data is None:
+        return None
+    _snapshot_store.save(session_id, data)
+    return len(data)
+
+def restore_saved_session_api(session_id: str = DEFAULT_SESSION_ID):
+    """Restores the session from the snapshot store; returns whether it is running, or None if nothing was saved."""
+    data = _snapshot_store.load(session_id)
+    if data is None:
+        return None
+    return restore_session_snapshot_api(session_id, data)
+
+def save_all_sessions_api():
+    return [session_id for session_id in _sessions.session_ids() if save_session_api(session_id) is not None]
+
+def run_batch_simulation_api(complexity: dict[str, int], wip_limit: int, red_card_delay_days: int | None = None, max_days: int = 10000):
+    """Runs (or recalls) one full headless round and returns its dashboard entry."""
+    metrics = simulate_round_cached(complexity, wip_limit, red_card_delay_days, max_days)
+    if metrics is None:
+        return None
+    return format_dashboard_entry(1, wip_limit, metrics)
+
+def preview_round_api(session_id: str = DEFAULT_SESSION_ID, max_days: int = 10000):
+    """Dashboard entry the session's current configuration will produce, without running the session."""
+    with _locked_model(session_id) as model:
+        parameters = model._current_simulation_parameters
+        complexity = dict(parameters.get("complexity", {}))
+        wip_limit = parameters.get("wip_limit", model.wip_limit)
+        red_card_delay_days = model._red_card_delay_days
+        next_round = model.round_counter + 1
+        workflow = model.workflow
+    # The preview round runs on its own model, so the session is not held meanwhile.
+    metrics = simulate_round_cached(complexity, wip_limit, red_card_delay_days, max_days, workflow=workflow)
+    if metrics is None:
+        return None
+    return format_dashboard_entry(next_round, wip_limit, metrics)
+
+def get_round_cache_stats_api():
+    stats = _round_cache.stats()
+    stats["rules_version"] = ENGINE_RULES_VERSION
+    return stats
+
+def clear_round_cache_api():
+    _round_cache.clear()
+
+def get_simulation_speed_api(session_id: str = DEFAULT_SESSION_ID):
+    session = _sessions.peek(session_id)
+    return session.model.get_simulation_speed() if session is not None else 1.0
@@ -1,10 +1,23 @@
 # kanban-python-backend/main.py
 
-from fastapi import FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import asyncio
+import csv
+import functools
+import io
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 import kanban_engine # <--- IMPORT YOUR ENGINE HERE
+import forecasting
+import metrics
+import wire_format
+from board_stream import SSE_KEEPALIVE, BoardBroadcaster, format_sse, format_sse_json
+from tick_scheduler import TickScheduler
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -32,11 +45,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Metrics (Prometheus text format at /metrics) ---
+# Step phase timing is off unless KANBAN_STEP_PHASE_TIMING=1 (or switched on via
+# /debug/phase-timing); the /debug endpoints exist only with KANBAN_DEBUG_ENDPOINTS=1.
+STEP_PHASE_TIMING = os.environ.get("KANBAN_STEP_PHASE_TIMING", "0") == "1"
+DEBUG_ENDPOINTS = os.environ.get("KANBAN_DEBUG_ENDPOINTS", "0") == "1"
+metrics_registry = metrics.MetricsRegistry()
+step_phase_seconds = metrics_registry.register(metrics.Histogram(
+    "kanban_step_phase_seconds", "Time spent in each phase of a simulation step.",
+    metrics.PHASE_BUCKETS, labelnames=("phase",),
+))
+request_seconds = metrics_registry.register(metrics.Histogram(
+    "kanban_http_request_duration_seconds", "Time until the response headers of an HTTP request were sent.",
+    labelnames=("method", "route", "status"),
+))
+loop_lag_seconds = metrics_registry.register(metrics.Histogram(
+    "kanban_event_loop_lag_seconds", "Delay of a timer on the event loop beyond its due time.",
+))
+loop_lag_last = metrics_registry.register(metrics.Gauge(
+    "kanban_event_loop_lag_last_seconds", "Most recent event loop lag measurement.",
+))
+metrics_registry.register(metrics.Gauge(
+    "kanban_sessions", "Sessions held by this worker.", function=lambda: kanban_engine.get_session_count_api(),
+))
+metrics_registry.register(metrics.Gauge(
+    "kanban_running_sessions", "Sessions with a running simulation.", function=lambda: len(tick_scheduler),
+))
+metrics_registry.register(metrics.Gauge(
+    "kanban_scheduler_tick_lag_seconds", "How late the last batch of simulation days was advanced.",
+    function=lambda: tick_scheduler.last_lag,
+))
+metrics_registry.register(metrics.Gauge(
+    "kanban_stream_viewers", "Open board streams.",
+    function=lambda: board_broadcaster.subscriber_count() + delta_broadcaster.subscriber_count(),
+))
+step_phase_timer = metrics.StepPhaseTimer(step_phase_seconds)
+profiler = metrics.SamplingProfiler()
+loop_lag_task = None
+app.add_middleware(metrics.LatencyMiddleware, histogram=request_seconds)
+
 # --- Pydantic Models for Request/Response ---
 class CardModel(BaseModel):
     id: str
     birth_id: int
-    col: int # Represents lane ID (0-7)
+    col: int # Represents lane ID (0 = Backlog ... last = Done, see /simulation/workflow)
     x: int
     y: int
     target_col: int | None = None
@@ -66,6 +118,52 @@ class SimulationConfig(BaseModel):
     wip_limit: int
     speed: float
 
+class WorkflowStage(BaseModel):
+    name: str
+    wait: str | None = "Warten..." # Title of the stage's wait queue; null for a stage without one
+    complexity: int = 1 # Default until the session configures one for this stage's work column
+    wip_group: str | None = None # Stages sharing a group share one WIP limit (default: the stage's own group)
+
+class WorkflowDefinition(BaseModel):
+    stages: list[WorkflowStage]
+    backlog: str = "Backlog"
+    done: str = "Done"
+    backlog_size: int = 12
+    wip_groups: dict[str, int] = {} # Fixed limits per group; other groups use the session's wip_limit
+
+# Headless rounds (batch, forecast, sweep) run on the default workflow, where every
+# stage uses the request's WIP limit: a limit of 0 never lets a card start.
+MAX_HEADLESS_DAYS = int(os.environ.get("KANBAN_MAX_HEADLESS_DAYS", "10000"))
+
+class BatchSimulationRequest(BaseModel):
+    complexity: dict[str, int]
+    wip_limit: int = Field(gt=0)
+    red_card_delay_days: int | None = None # Defaults to the engine's delay
+    max_days: int = Field(10000, gt=0, le=MAX_HEADLESS_DAYS) # Safety net for configurations that never finish
+
+class ForecastRequest(BaseModel):
+    complexity: dict[str, int]
+    wip_limit: int = Field(gt=0)
+    replications: int = 1000
+    variability: float = 0.5 # Std. deviation of per-card processing time, relative to complexity
+    seed: int = 0 # Replication i uses seed + i
+    red_card_delay_days: int | None = None
+    max_days: int = Field(10000, gt=0, le=MAX_HEADLESS_DAYS)
+
+class SweepRange(BaseModel):
+    start: int
+    stop: int # Inclusive
+    step: int = 1
+
+class SweepRequest(BaseModel):
+    wip_limit: SweepRange | list[int] | int
+    complexity: dict[str, SweepRange | list[int] | int] # Keyed by working column id, like SimulationConfig
+    red_card_delay_days: int | None = None
+    max_days: int = Field(10000, gt=0, le=MAX_HEADLESS_DAYS)
+
+MAX_SWEEP_POINTS = int(os.environ.get("KANBAN_MAX_SWEEP_POINTS", "10000"))
+MAX_FORECAST_REPLICATIONS = int(os.environ.get("KANBAN_MAX_FORECAST_REPLICATIONS", "100000"))
+
 class DashboardEntry(BaseModel):
     round: int
     wip_limit: int
@@ -77,119 +175,576 @@ class DashboardEntry(BaseModel):
 
 
 # --- Global FastAPI State Variables ---
-simulation_task = None # To hold the asyncio task for the simulation loop
-
-# --- Internal Simulation Loop (Calls your engine's step function) ---
-async def run_simulation_loop():
-    global simulation_task
+session_eviction_task = None
+SESSION_EVICTION_INTERVAL = float(os.environ.get("KANBAN_SESSION_EVICTION_INTERVAL", "60"))
+event_shipping_task = None
+# Set KANBAN_EVENT_SHIPPING_INTERVAL (seconds) to forward engine events to the
+# "kanban.events" logger as JSON lines. Shipping is off by default.
+EVENT_SHIPPING_INTERVAL = float(os.environ.get("KANBAN_EVENT_SHIPPING_INTERVAL", "0"))
+event_logger = logging.getLogger("kanban.events")
+board_broadcaster = BoardBroadcaster()
+delta_broadcaster = BoardBroadcaster() # Viewers of /simulation/stream?mode=delta
+delta_versions: dict[str, int] = {} # Board version of the last delta frame published per session
+STREAM_KEEPALIVE_SECONDS = float(os.environ.get("KANBAN_STREAM_KEEPALIVE_SECONDS", "15"))
+# Engine work (steps, snapshots, headless rounds) runs on these threads, never on the
+# event loop; each call holds its session's lock (see kanban_engine._locked_model).
+# Set KANBAN_SNAPSHOT_ON_SHUTDOWN=1 to save every session to the snapshot store
+# (KANBAN_SNAPSHOT_DIR) on shutdown, so they can be restored after a restart.
+SNAPSHOT_ON_SHUTDOWN = os.environ.get("KANBAN_SNAPSHOT_ON_SHUTDOWN", "0") == "1"
+ENGINE_THREADS = int(os.environ.get("KANBAN_ENGINE_THREADS", "4"))
+engine_executor = ThreadPoolExecutor(max_workers=ENGINE_THREADS, thread_name_prefix="kanban-engine")
+
+async def run_engine(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(engine_executor, functools.partial(func, *args, **kwargs))
+
+# --- Session Handling ---
+# The frontend identifies its board with an X-Session-Id header (EventSource-style
+# clients may use the session_id query parameter instead). Requests without either
+# share the default session, which keeps the old single-board behaviour.
+def get_session_id(
+    session_id: str | None = None,
+    x_session_id: str | None = Header(default=None),
+) -> str:
+    return x_session_id or session_id or kanban_engine.DEFAULT_SESSION_ID
+
+@app.exception_handler(kanban_engine.SessionLimitError)
+async def session_limit_exception_handler(request: Request, exc: kanban_engine.SessionLimitError):
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": str(exc)})
+
+def unschedule_simulation(session_id: str):
+    if tick_scheduler.cancel(session_id):
+        print(f"FastAPI: Simulation of session {session_id} unscheduled.")
+
+async def run_session_eviction_loop():
     try:
-        while kanban_engine.is_simulation_active():
-            kanban_engine.advance_simulation_step()
-            # The engine itself sets the _red_card_reached_end flag and handles stopping.
-            # We just break this FastAPI loop if the engine says it's stopped.
-            if not kanban_engine.is_simulation_active(): # Check if engine itself deactivated simulation
-                 break
-            await asyncio.sleep(kanban_engine.get_simulation_speed())
+        while True:
+            await asyncio.sleep(SESSION_EVICTION_INTERVAL)
+            for session_id in await run_engine(kanban_engine.evict_idle_sessions_api):
+                unschedule_simulation(session_id)
+                delta_versions.pop(session_id, None)
+                print(f"FastAPI: Evicted idle session {session_id}.")
     except asyncio.CancelledError:
-        print("FastAPI: Simulation loop task was cancelled.")
-    finally:
-        print("FastAPI: Simulation loop finished.")
-        simulation_task = None # Ensure task is cleared if loop ends
+        pass
 
 # --- API Endpoints ---
 @app.get("/")
 async def read_root():
     return {"message": "Hello from your Python FastAPI backend!"}
 
+@app.post("/sessions")
+async def create_session_endpoint():
+    session_id = await run_engine(kanban_engine.create_session_api)
+    return {"status": "success", "session_id": session_id}
+
+@app.delete("/sessions/{session_id}")
+async def delete_session_endpoint(session_id: str):
+    unschedule_simulation(session_id)
+    if not await run_engine(kanban_engine.evict_session_api, session_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
+    return {"status": "success", "message": "Session deleted."}
+
+# --- Session Snapshots ---
+# A snapshot is the compact binary form of a session's board (see kanban_engine
+# "Snapshots"). GET/PUT move it over HTTP, save/restore go through the configured
+# snapshot store, so a session can continue on another worker or after a restart.
+async def resume_restored_session(session_id: str, running: bool):
+    unschedule_simulation(session_id)
+    delta_versions.pop(session_id, None)
+    await publish_board_frame(session_id, include_dashboard=True)
+    if running:
+        tick_scheduler.schedule(session_id)
+
+@app.get("/sessions/{session_id}/snapshot")
+async def get_session_snapshot_endpoint(session_id: str):
+    data = await run_engine(kanban_engine.get_session_snapshot_api, session_id)
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
+    return Response(content=data, media_type="application/octet-stream")
+
+@app.put("/sessions/{session_id}/snapshot")
+async def put_session_snapshot_endpoint(session_id: str, request: Request):
+    data = await request.body()
+    try:
+        running = await run_engine(kanban_engine.restore_session_snapshot_api, session_id, data)
+    except kanban_engine.SnapshotError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    await resume_restored_session(session_id, running)
+    return {"status": "success", "session_id": session_id, "is_running": running}
+
+@app.post("/sessions/{session_id}/save")
+async def save_session_endpoint(session_id: str):
+    try:
+        size = await run_engine(kanban_engine.save_session_api, session_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    if size is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
+    return {"status": "success", "session_id": session_id, "bytes": size}
+
+@app.post("/sessions/{session_id}/restore")
+async def restore_session_endpoint(session_id: str):
+    try:
+        running = await run_engine(kanban_engine.restore_saved_session_api, session_id)
+    except ValueError as exc: # Includes SnapshotError
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    if running is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No saved snapshot for this session.")
+    await resume_restored_session(session_id, running)
+    return {"status": "success", "session_id": session_id, "is_running": running}
+
 @app.post("/simulation/config")
-async def set_simulation_config_endpoint(config: SimulationConfig):
+async def set_simulation_config_endpoint(config: SimulationConfig, session_id: str = Depends(get_session_id)):
     # Change: kanban_engine.set_simulation_parameters_api
-    kanban_engine.set_simulation_parameters_api(
+    await run_engine(
+        kanban_engine.set_simulation_parameters_api,
         complexity=config.complexity,
         wip_limit=config.wip_limit,
-        speed=config.speed
+        speed=config.speed,
+        session_id=session_id,
     )
+    await publish_board_frame(session_id)
     return {"status": "success", "message": "Simulation parameters updated", "parameters": config.model_dump()}
 
+# --- Workflow ---
+# The board layout of a session (see workflow.py). Changing it resets the board, so it
+# is only allowed while the simulation is stopped.
+@app.get("/simulation/workflow")
+async def get_workflow_endpoint(session_id: str = Depends(get_session_id)):
+    return await run_engine(kanban_engine.get_workflow_api, session_id)
+
+@app.put("/simulation/workflow")
+async def set_workflow_endpoint(definition: WorkflowDefinition, session_id: str = Depends(get_session_id)):
+    if kanban_engine.is_simulation_active_api(session_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Stop the simulation before changing the workflow.")
+    try:
+        result = await run_engine(kanban_engine.set_workflow_api, definition.model_dump(), session_id)
+    except kanban_engine.WorkflowError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    if result["status"] != "success":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=result["message"])
+    delta_versions.pop(session_id, None)
+    await publish_board_frame(session_id)
+    return result
+
 @app.post("/simulation/start")
-async def start_simulation_endpoint():
-    global simulation_task
+async def start_simulation_endpoint(session_id: str = Depends(get_session_id)):
     # Change: kanban_engine.is_simulation_active_api
-    if kanban_engine.is_simulation_active_api():
+    if kanban_engine.is_simulation_active_api(session_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Simulation is already running.")
 
     # Change: kanban_engine.start_simulation_api
-    kanban_engine.start_simulation_api()
+    await run_engine(kanban_engine.start_simulation_api, session_id)
 
-    simulation_task = asyncio.create_task(run_simulation_loop())
-    print("FastAPI: Simulation background task started.")
+    await publish_board_frame(session_id)
+    tick_scheduler.schedule(session_id)
+    print(f"FastAPI: Simulation scheduled for session {session_id}.")
     return {"status": "success", "message": "Simulation started."}
 
 @app.post("/simulation/stop")
-async def stop_simulation_endpoint():
-    global simulation_task
+async def stop_simulation_endpoint(session_id: str = Depends(get_session_id)):
     # Change: kanban_engine.is_simulation_active_api
-    if not kanban_engine.is_simulation_active_api():
+    if not kanban_engine.is_simulation_active_api(session_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Simulation is not running.")
 
     # Change: kanban_engine.stop_simulation_api
-    kanban_engine.stop_simulation_api()
+    await run_engine(kanban_engine.stop_simulation_api, session_id)
 
-    if simulation_task:
-        simulation_task.cancel()
-        try:
-            await simulation_task
-        except asyncio.CancelledError:
-            print("FastAPI: Simulation task cancelled successfully.")
-        finally:
-            simulation_task = None
+    unschedule_simulation(session_id)
+    await publish_board_frame(session_id)
 
     print("FastAPI: Simulation stopped.")
     return {"status": "success", "message": "Simulation stopped."}
 
+@app.post("/simulation/batch")
+async def run_batch_simulation_endpoint(request: BatchSimulationRequest):
+    # Runs one complete round headlessly (no sleeps, no animation state) for "what-if" views.
+    dashboard_entry = await run_engine(
+        kanban_engine.run_batch_simulation_api,
+        complexity=request.complexity,
+        wip_limit=request.wip_limit,
+        red_card_delay_days=request.red_card_delay_days,
+        max_days=request.max_days,
+    )
+    if dashboard_entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Red card did not reach Done within {request.max_days} days.",
+        )
+    return {"status": "success", "dashboard_entry": dashboard_entry}
+
+@app.post("/simulation/forecast")
+async def run_forecast_endpoint(request: ForecastRequest):
+    # Monte Carlo: N independent, seeded replications spread over the process pool,
+    # summarized as p50/p85/p95 of red-card cycle time, throughput and flow efficiency.
+    if not 1 <= request.replications <= MAX_FORECAST_REPLICATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"replications must be between 1 and {MAX_FORECAST_REPLICATIONS}.",
+        )
+    config = {
+        "complexity": request.complexity,
+        "wip_limit": request.wip_limit,
+        "red_card_delay_days": request.red_card_delay_days,
+        "variability": request.variability,
+        "max_days": request.max_days,
+    }
+    forecast = await forecasting.run_monte_carlo(config, request.replications, seed=request.seed)
+    return {"status": "success", "forecast": forecast}
+
+@app.post("/simulation/sweep")
+async def run_sweep_endpoint(request: SweepRequest):
+    # Runs every unique (wip_limit, complexity) combination of the grid headlessly and
+    # streams one NDJSON line per point as it completes, then a summary line.
+    def to_spec(value):
+        return value.model_dump() if isinstance(value, SweepRange) else value
+    try:
+        grid = forecasting.build_sweep_grid(
+            to_spec(request.wip_limit),
+            {col: to_spec(spec) for col, spec in request.complexity.items()},
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    if len(grid) > MAX_SWEEP_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Sweep has {len(grid)} configurations, the limit is {MAX_SWEEP_POINTS}.",
+        )
+
+    async def result_lines():
+        async for result in forecasting.run_sweep(grid, request.red_card_delay_days, request.max_days):
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"done": True, "points": len(grid)}) + "\n"
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
+@app.get("/simulation/preview")
+async def preview_simulation_endpoint(session_id: str = Depends(get_session_id)):
+    # Predicts the dashboard entry of the session's next round from its current
+    # configuration; repeated previews of the same configuration come from the cache.
+    dashboard_entry = await run_engine(kanban_engine.preview_round_api, session_id)
+    if dashboard_entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Red card would not reach Done with the current configuration.",
+        )
+    return {"status": "success", "dashboard_entry": dashboard_entry}
+
+@app.get("/cache/stats")
+async def get_round_cache_stats_endpoint():
+    return kanban_engine.get_round_cache_stats_api()
+
+@app.post("/cache/clear")
+async def clear_round_cache_endpoint():
+    kanban_engine.clear_round_cache_api()
+    return {"status": "success", "message": "Round cache cleared."}
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+# --- Content Negotiation ---
+# Board and dashboard payloads come as the original JSON (default), as columnar JSON
+# (Accept: application/vnd.kanban.columnar+json) or as columnar MessagePack (Accept:
+# application/msgpack); larger bodies are compressed per Accept-Encoding (br, gzip).
+def negotiated_format(accept: str | None) -> str:
+    fmt = wire_format.negotiate_format(accept)
+    if fmt is None:
+        supported = ", ".join(wire_format.MEDIA_TYPES.values())
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f"Supported media types: {supported}.")
+    return fmt
+
+def encode_payload(fmt: str, payload, encoding: str | None) -> tuple[bytes, str | None]:
+    return wire_format.compress(wire_format.encode(fmt, payload), encoding)
+
+def encoded_response(body: bytes, fmt: str, encoding: str | None, headers: dict | None = None) -> Response:
+    headers = {"Vary": "Accept, Accept-Encoding", **(headers or {})}
+    if encoding is not None: headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=wire_format.MEDIA_TYPES[fmt], headers=headers)
+
 @app.get("/simulation/status", response_model=BoardStateModel)
-async def get_simulation_status():
-    # Change: kanban_engine.get_current_board_state_api
-    board_state_data = kanban_engine.get_current_board_state_api()
-    return board_state_data
+async def get_simulation_status(
+    session_id: str = Depends(get_session_id),
+    if_none_match: str | None = Header(default=None),
+    accept: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
+):
+    # The engine serializes the board once per day and representation and returns the
+    # same bytes until the next change (documented by response_model, but not
+    # re-validated per request). Clients sending the ETag back get 304 Not Modified
+    # while the day has not moved.
+    fmt = negotiated_format(accept)
+    encoding = wire_format.negotiate_encoding(accept_encoding)
+    etag, body, encoding = await run_engine(kanban_engine.get_board_payload_api, session_id, fmt, encoding)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"Vary": "Accept, Accept-Encoding", **headers})
+    return encoded_response(body, fmt, encoding, headers)
+
+@app.get("/simulation/stream")
+async def stream_simulation_endpoint(mode: str = "full", session_id: str = Depends(get_session_id)):
+    # Server-Sent Events: one frame per simulated day, a "dashboard" frame when a round
+    # finishes and a comment line as keepalive while nothing happens. mode=full sends
+    # "board" frames with every lane; mode=delta sends "changes" frames with only the
+    # cards that changed (the first one is always a full snapshot).
+    if mode == "delta":
+        broadcaster = delta_broadcaster
+        queue = broadcaster.subscribe(session_id)
+        snapshot = await run_engine(kanban_engine.get_board_changes_api, session_id, since=-1)
+        delta_versions.setdefault(session_id, snapshot["version"])
+        initial_board = format_sse("changes", snapshot)
+    elif mode == "full":
+        broadcaster = board_broadcaster
+        queue = broadcaster.subscribe(session_id)
+        frame_json = await run_engine(kanban_engine.get_board_frame_json_api, session_id, create=True)
+        initial_board = format_sse_json("board", frame_json)
+    else:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="mode must be 'full' or 'delta'.")
+    dashboard_entries = await run_engine(kanban_engine.get_recent_dashboard_api, session_id)
+    initial_dashboard = format_sse("dashboard", {"dashboard_entries": dashboard_entries})
+
+    async def event_source():
+        try:
+            yield initial_board
+            yield initial_dashboard
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield SSE_KEEPALIVE
+                    continue
+                yield frame
+        finally:
+            broadcaster.unsubscribe(session_id, queue)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/simulation/changes")
+async def get_simulation_changes_endpoint(since: int = -1, session_id: str = Depends(get_session_id)):
+    # Cards changed after board version `since`; a full snapshot ("full": true) when the
+    # client is too far behind or the board was reset since.
+    return await run_engine(kanban_engine.get_board_changes_api, session_id, since)
+
+@app.get("/simulation/events")
+async def get_simulation_events_endpoint(since: int = 0, session_id: str = Depends(get_session_id)):
+    return {"events": await run_engine(kanban_engine.get_events_api, session_id, since)}
 
 @app.get("/dashboard/data")
-async def get_dashboard_data_endpoint():
-    # Change: kanban_engine.get_dashboard_metrics_api
-    return {"dashboard_entries": kanban_engine.get_dashboard_metrics_api()}
+async def get_dashboard_data_endpoint(
+    since_round: int = 0,
+    limit: int | None = None,
+    session_id: str = Depends(get_session_id),
+    accept: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
+):
+    # Rounds come from the persistent dashboard history. Each entry has a "position"
+    # (1, 2, 3, ... per session); pass the last one seen as since_round to page.
+    # Columnar formats carry the numeric values (as in /dashboard/export), one array per field.
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="limit must be positive.")
+    fmt = negotiated_format(accept)
+    if fmt == wire_format.FORMAT_JSON:
+        entries = await run_engine(kanban_engine.get_dashboard_history_api, session_id, since_round, limit)
+        payload = {"dashboard_entries": entries, "last_round": entries[-1]["position"] if entries else since_round}
+    else:
+        rounds = await run_engine(kanban_engine.get_dashboard_columns_api, session_id, since_round, limit)
+        payload = {"rounds": rounds, "last_round": rounds["position"][-1] if rounds["position"] else since_round}
+    # Long histories make large bodies, so encoding and compression stay off the event loop.
+    body, encoding = await run_engine(encode_payload, fmt, payload, wire_format.negotiate_encoding(accept_encoding))
+    return encoded_response(body, fmt, encoding)
+
+@app.get("/dashboard/flow")
+async def get_dashboard_flow_endpoint(since_day: int = -1, window: int = 10, session_id: str = Depends(get_session_id)):
+    # Cumulative flow of the current round: one row of per-column arrival counts per day
+    # (pass the last day seen as since_day to fetch only new rows), arrival/departure
+    # rates over the last `window` days and cycle-time quantiles of all finished cards.
+    if window < 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="window must be positive.")
+    return await run_engine(kanban_engine.get_flow_metrics_api, session_id, since_day, window)
+
+@app.get("/dashboard/export")
+async def export_dashboard_endpoint(format: str = "csv", since_round: int = 0, session_id: str = Depends(get_session_id)):
+    # Streams the whole history with numeric values, reading the store page by page,
+    # so long workshop histories are never held in memory at once.
+    rows = kanban_engine.iter_dashboard_history_api(session_id, since_round)
+    if format == "ndjson":
+        lines = (json.dumps(row) + "\n" for row in rows)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    if format != "csv":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="format must be 'csv' or 'ndjson'.")
+
+    def csv_lines():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=kanban_engine.DASHBOARD_EXPORT_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    # Plain generators are iterated in Starlette's thread pool, off the event loop.
+    return StreamingResponse(
+        csv_lines(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="dashboard-{session_id}.csv"'},
+    )
 
 @app.post("/dashboard/clear")
-async def clear_dashboard_endpoint():
+async def clear_dashboard_endpoint(session_id: str = Depends(get_session_id)):
     # Change: kanban_engine.clear_dashboard_data_api
-    kanban_engine.clear_dashboard_data_api()
+    await run_engine(kanban_engine.clear_dashboard_data_api, session_id)
+    await publish_board_frame(session_id, include_dashboard=True)
     return {"status": "success", "message": "Dashboard cleared."}
 
-# --- Internal Simulation Loop (Calls your engine's step function) ---
-async def run_simulation_loop():
-    global simulation_task
+# --- Event Log Shipping ---
+def ship_event_batches(batches):
+    for session_id, records in batches:
+        for record in records:
+            event_logger.info(json.dumps({"session_id": session_id, **record}, default=str))
+
+async def run_event_shipping_loop():
     try:
-        # Change: kanban_engine.is_simulation_active_api
-        while kanban_engine.is_simulation_active_api():
-            # Change: kanban_engine.advance_simulation_step_api
-            kanban_engine.advance_simulation_step_api()
-            # Change: kanban_engine.is_simulation_active_api
-            if not kanban_engine.is_simulation_active_api():
-                 break
-            # Change: kanban_engine.get_simulation_speed_api
-            await asyncio.sleep(kanban_engine.get_simulation_speed_api())
+        while True:
+            await asyncio.sleep(EVENT_SHIPPING_INTERVAL)
+            batches = await run_engine(kanban_engine.take_unshipped_events_api)
+            if batches:
+                # Log handlers may do blocking I/O, so keep them off the event loop.
+                await asyncio.to_thread(ship_event_batches, batches)
     except asyncio.CancelledError:
-        print("FastAPI: Simulation loop task was cancelled.")
-    finally:
-        print("FastAPI: Simulation loop finished.")
-        simulation_task = None
+        pass
+
+# --- Board Streaming ---
+def build_board_frames(session_id: str, want_delta: bool, delta_since: int, want_full: bool, include_dashboard: bool):
+    """Reads and serializes the frames for one publish; runs in an engine thread.
+
+    Returns (delta_version, delta_frames, full_frames) with already formatted SSE strings.
+    """
+    delta_version = None
+    delta_frames, full_frames = [], []
+    dashboard_frame = None
+    if include_dashboard:
+        dashboard = {"dashboard_entries": kanban_engine.get_recent_dashboard_api(session_id)}
+        dashboard_frame = format_sse("dashboard", dashboard)
+    if want_delta:
+        changes = kanban_engine.get_board_changes_api(session_id, since=delta_since)
+        delta_version = changes["version"]
+        delta_frames.append(format_sse("changes", changes))
+        if dashboard_frame: delta_frames.append(dashboard_frame)
+    if want_full:
+        frame_json = kanban_engine.get_board_frame_json_api(session_id)
+        if frame_json is not None:
+            full_frames.append(format_sse_json("board", frame_json))
+            if dashboard_frame: full_frames.append(dashboard_frame)
+    return delta_version, delta_frames, full_frames
+
+async def publish_board_frame(session_id: str, include_dashboard: bool = False):
+    want_delta = delta_broadcaster.has_subscribers(session_id)
+    want_full = board_broadcaster.has_subscribers(session_id)
+    if not (want_delta or want_full):
+        return
+    delta_version, delta_frames, full_frames = await run_engine(
+        build_board_frames, session_id, want_delta, delta_versions.get(session_id, -1), want_full, include_dashboard,
+    )
+    # Broadcaster queues belong to the event loop, so publishing happens back here.
+    if delta_version is not None:
+        delta_versions[session_id] = delta_version
+    for frame in delta_frames:
+        delta_broadcaster.publish(session_id, frame)
+    for frame in full_frames:
+        board_broadcaster.publish(session_id, frame)
+
+# --- Tick Scheduler ---
+# One scheduler task advances every running session when its next day is due,
+# batching all sessions that are due at the same time into one engine-thread call.
+async def advance_due_sessions(session_ids: list[str]):
+    return await run_engine(kanban_engine.advance_sessions_api, session_ids)
+
+async def publish_advanced_sessions(results):
+    for session_id, running, _ in results:
+        try:
+            await publish_board_frame(session_id, include_dashboard=not running)
+        except Exception:
+            logging.getLogger("kanban.scheduler").exception("Publishing the board of session %s failed.", session_id)
+
+tick_scheduler = TickScheduler(advance_due_sessions, on_batch=publish_advanced_sessions)
+
+@app.get("/scheduler/stats")
+async def get_scheduler_stats_endpoint():
+    # Tick lag: how late sessions were advanced after their due time. Drift: time
+    # skipped because sessions could not keep up with their configured speed.
+    return tick_scheduler.stats()
+
+
+# --- Metrics and Debug Endpoints ---
+@app.get("/metrics")
+async def get_metrics_endpoint():
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+def require_debug_endpoints():
+    if not DEBUG_ENDPOINTS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+@app.post("/debug/phase-timing", dependencies=[Depends(require_debug_endpoints)])
+async def set_phase_timing_endpoint(enabled: bool = True):
+    kanban_engine.set_step_phase_observer(step_phase_timer if enabled else None)
+    return {"status": "success", "phase_timing": enabled}
+
+@app.post("/debug/profiler/start", dependencies=[Depends(require_debug_endpoints)])
+async def start_profiler_endpoint(interval: float = 0.005, reset: bool = True):
+    if reset: profiler.reset()
+    profiler.start(max(interval, 0.001))
+    return {"status": "success", "interval": profiler.interval}
+
+@app.post("/debug/profiler/stop", dependencies=[Depends(require_debug_endpoints)])
+async def stop_profiler_endpoint():
+    await asyncio.to_thread(profiler.stop)
+    return {"status": "success", "samples": profiler.samples}
+
+@app.get("/debug/profiler", dependencies=[Depends(require_debug_endpoints)])
+async def get_profile_endpoint(limit: int | None = None):
+    # Collapsed stacks ("frame;frame;frame count"), ready for flamegraph tools.
+    return Response(content=profiler.collapsed(limit), media_type="text/plain")
 
 
 @app.on_event("startup")
 async def startup_event():
     # This one was already correct
+    global session_eviction_task, event_shipping_task, loop_lag_task
     kanban_engine.initialize_engine_api()
+    tick_scheduler.start()
+    if STEP_PHASE_TIMING:
+        kanban_engine.set_step_phase_observer(step_phase_timer)
+    loop_lag_task = asyncio.create_task(metrics.monitor_event_loop_lag(loop_lag_seconds, loop_lag_last))
+    session_eviction_task = asyncio.create_task(run_session_eviction_loop())
+    if EVENT_SHIPPING_INTERVAL > 0:
+        event_shipping_task = asyncio.create_task(run_event_shipping_loop())
     print("FastAPI app startup: Kanban Engine initialized.")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    if session_eviction_task:
+        session_eviction_task.cancel()
+    if event_shipping_task:
+        event_shipping_task.cancel()
+    if loop_lag_task:
+        loop_lag_task.cancel()
+    profiler.stop()
+    forecasting.shutdown_process_pool()
+    await tick_scheduler.stop()
+    if SNAPSHOT_ON_SHUTDOWN:
+        saved = await run_engine(kanban_engine.save_all_sessions_api)
+        print(f"FastAPI: Saved {len(saved)} session snapshots.")
+    engine_executor.shutdown(wait=False, cancel_futures=True)
+    kanban_engine.close_dashboard_store_api()
+
 
 
 
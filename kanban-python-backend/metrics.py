@@ -0,0 +1,218 @@
+# kanban-python-backend/metrics.py
+
+import asyncio
+import bisect
+import collections
+import os
+import sys
+import threading
+import time
+
+# Buckets in seconds: engine phases take microseconds, requests milliseconds.
+PHASE_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+LOOP_LAG_INTERVAL = float(os.environ.get("KANBAN_LOOP_LAG_INTERVAL", "0.5"))
+
+
+def _format_labels(labelnames, labelvalues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# --- Metric Types ---
+class Histogram:
+    """Cumulative Prometheus histogram with optional labels; observe() is thread safe."""
+
+    def __init__(self, name: str, documentation: str, buckets=LATENCY_BUCKETS, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series: dict[tuple, list] = {} # labelvalues -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labelvalues, series in series_items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """A gauge that is either set directly or read from ``function`` at scrape time."""
+
+    def __init__(self, name: str, documentation: str, function=None):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def render(self) -> list[str]:
+        value = self.function() if self.function is not None else self.value
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_format_value(value)}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# --- Collectors ---
+class StepPhaseTimer:
+    """Receives per-phase durations from kanban_engine.set_step_phase_observer."""
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __call__(self, phases):
+        observe = self.histogram.observe
+        for phase, seconds in phases:
+            observe(seconds, phase)
+
+
+class LatencyMiddleware:
+    """Pure ASGI middleware timing every HTTP request until its response headers are sent.
+
+    Requests are labelled with the route template ("/sessions/{session_id}") rather
+    than the raw path, so the number of series stays bounded. Streaming responses
+    (SSE, exports) count the time to their first byte, not their whole lifetime.
+    """
+
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                route = scope.get("route")
+                self.histogram.observe(time.perf_counter() - started, scope["method"],
+                                       getattr(route, "path", "unmatched"), status_code)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+async def monitor_event_loop_lag(histogram: Histogram, gauge: Gauge, interval: float = LOOP_LAG_INTERVAL):
+    """Sleeps ``interval`` seconds in a loop; any extra delay is time the loop was blocked."""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - started - interval)
+            histogram.observe(lag)
+            gauge.set(lag)
+    except asyncio.CancelledError:
+        pass
+
+
+# --- Sampling Profiler ---
+class SamplingProfiler:
+    """Opt-in statistical profiler: samples every thread's stack at a fixed interval.
+
+    A background thread reads sys._current_frames(), so the profiled code is not
+    instrumented at all. Results are collapsed stacks ("frame;frame;frame count"),
+    the input format of flamegraph tools.
+    """
+
+    def __init__(self):
+        self.interval = 0.005
+        self.samples = 0
+        self._stacks: collections.Counter[str] = collections.Counter()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, interval: float = 0.005):
+        if self._thread is not None:
+            return
+        self.interval = interval
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="kanban-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def reset(self):
+        self._stacks.clear()
+        self.samples = 0
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_label(frame.f_code))
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _frame_label(code) -> str:
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+    def collapsed(self, limit: int | None = None) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common(limit))
@@ -0,0 +1,71 @@
+# kanban-python-backend/round_cache.py
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+MISSING = object() # Returned by RoundCache.get for unknown keys (None is a valid cached value)
+
+
+def canonical_key(**params) -> str:
+    """Stable hash of a parameter set: key order and dict ordering do not matter."""
+    payload = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class RoundCache:
+    """LRU cache of finished-round results keyed by a canonical parameter hash.
+
+    Only deterministic rounds belong here (no variability, or a fixed seed). The key
+    must include everything that influences the outcome, including the engine rules
+    version, so a rules change or a different seed simply misses. The cache is shared
+    by the event loop and the engine worker threads, so every access takes a lock.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, object] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str, default=MISSING):
+        with self._lock:
+            value = self._entries.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def __contains__(self, key: str):
+        return key in self._entries
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,107 @@
+# kanban-python-backend/snapshot_store.py
+
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+
+SNAPSHOT_DIR = os.environ.get("KANBAN_SNAPSHOT_DIR", "") # Empty: keep snapshots in process memory
+
+_SAFE_SESSION_ID = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+
+class SnapshotStore(ABC):
+    """Where session snapshots (bytes from KanbanModel.to_snapshot) are kept.
+
+    Subclasses implement save/load/delete/session_ids. A store shared by several
+    uvicorn workers (a common directory, or an external key-value store implementing
+    the same four methods) lets a session be saved on one worker and restored on
+    another.
+    """
+
+    @abstractmethod
+    def save(self, session_id: str, data: bytes):
+        ...
+
+    @abstractmethod
+    def load(self, session_id: str) -> bytes | None:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def session_ids(self) -> list[str]:
+        ...
+
+
+class MemorySnapshotStore(SnapshotStore):
+    def __init__(self):
+        self._snapshots: dict[str, bytes] = {}
+
+    def save(self, session_id: str, data: bytes):
+        self._snapshots[session_id] = bytes(data)
+
+    def load(self, session_id: str) -> bytes | None:
+        return self._snapshots.get(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        return self._snapshots.pop(session_id, None) is not None
+
+    def session_ids(self) -> list[str]:
+        return list(self._snapshots)
+
+
+class FileSnapshotStore(SnapshotStore):
+    """One ``<session_id>.kbs`` file per session in ``directory``.
+
+    Files are written to a temporary name and renamed into place, so a reader on
+    another worker never sees a half-written snapshot.
+    """
+
+    SUFFIX = ".kbs"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        if not _SAFE_SESSION_ID.match(session_id):
+            raise ValueError(f"Session id {session_id!r} cannot be used as a snapshot file name.")
+        return os.path.join(self.directory, session_id + self.SUFFIX)
+
+    def save(self, session_id: str, data: bytes):
+        path = self._path(session_id)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, session_id: str) -> bytes | None:
+        try:
+            with open(self._path(session_id), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, session_id: str) -> bool:
+        try:
+            os.unlink(self._path(session_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def session_ids(self) -> list[str]:
+        return [name[:-len(self.SUFFIX)] for name in os.listdir(self.directory) if name.endswith(self.SUFFIX)]
+
+
+def create_snapshot_store() -> SnapshotStore:
+    """Store selected by KANBAN_SNAPSHOT_DIR (a directory, shared between workers if they should share sessions)."""
+    if SNAPSHOT_DIR:
+        return FileSnapshotStore(SNAPSHOT_DIR)
+    return MemorySnapshotStore()
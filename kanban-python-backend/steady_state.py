@@ -0,0 +1,170 @@
+# kanban-python-backend/steady_state.py
+
+from workflow import FIRST_STAGE_COLUMN
+
+MAX_TRACKED_STATES = 100_000 # Bound on remembered board states while looking for a cycle
+
+
+class CompactRound:
+    """One deterministic round on a count-only board, with steady-state fast-forward.
+
+    Without variability the flow of cards does not depend on which card is red: the
+    next day follows from the card count of every column but Done and the processing
+    time of each working column's head card (the state VectorBoards uses, see
+    tests/test_parity.py). That state is hashed every day. Once it repeats, the board
+    is in a cycle of ``period`` days in which the same cards-per-period leave
+    every column, so whole periods are skipped at once:
+
+    - before the red card exists, up to the day before it is generated;
+    - while it waits in a column, as long as it cannot reach the head and leave
+      within the skipped periods (cards ahead of it >= cards leaving per period).
+
+    Done cards, the red card's work (BZ) and wait (WZ) days and the day counter
+    advance by their per-period deltas. Everything else is stepped day by day, so
+    the metrics equal those of KanbanModel.run_until_red_card_done exactly.
+    """
+
+    def __init__(self, workflow, complexity_by_col, group_limits, red_card_day: int):
+        self.workflow = workflow
+        self.complexity = list(complexity_by_col)
+        self.group_limits = list(group_limits)
+        self.red_card_day = red_card_day
+        self.day = 0
+        self.counts = [0] * workflow.column_count
+        self.counts[0] = workflow.backlog_size
+        self.head_pt = [0] * workflow.column_count
+        self.red_col = -1 # -1: not generated yet
+        self.red_ahead = 0
+        self.red_start = 0
+        self.BZ = 0
+        self.WZ = 0
+        self.skipped_days = 0
+
+    @classmethod
+    def from_model(cls, model) -> "CompactRound":
+        """Compact state of a running, deterministic KanbanModel between two days."""
+        workflow = model.workflow
+        compact = cls(workflow, model._complexity_by_col, model._group_limits, model._red_card_generation_day)
+        compact.day = model.day_count
+        compact.counts = [len(column) for column in model.columns]
+        for col in workflow.working_columns:
+            compact.head_pt[col] = model.columns[col][0].processing_time if model.columns[col] else 0
+        for col, column in enumerate(model.columns):
+            for ahead, card in enumerate(column):
+                if card.is_red:
+                    compact.red_col, compact.red_ahead = col, ahead
+                    compact.red_start, compact.BZ, compact.WZ = card.start_day, card.BZ, card.WZ
+        return compact
+
+    def step(self):
+        workflow = self.workflow
+        counts = self.counts
+        head_pt = self.head_pt
+        done_column = workflow.done_column
+        self.day += 1
+
+        if self.red_col < 0 and self.day >= self.red_card_day and counts[0] > 0:
+            self.red_col, self.red_ahead = 0, 0
+        red_col = self.red_col
+        if 0 <= red_col < done_column:
+            if workflow.is_working[red_col]:
+                self.BZ += 1
+            else:
+                owner = workflow.wait_owner[red_col]
+                if owner >= 0 and counts[owner] > 0:
+                    self.WZ += 1
+
+        moved_out = [0] * len(counts)
+        group_columns = workflow.group_columns
+        for col in workflow.working_columns:
+            if counts[col]:
+                if head_pt[col] >= self.complexity[col]:
+                    head_pt[col] = 0
+                    moved_out[col] = 1
+                    continue
+                head_pt[col] += 1
+            source = workflow.pull_source[col]
+            if source < 0 or not counts[source]:
+                continue
+            group = workflow.group_of[col]
+            if sum(counts[group_col] - moved_out[group_col] for group_col in group_columns[group]) < self.group_limits[group]:
+                moved_out[source] = 1
+        final_queue = workflow.final_queue
+        if final_queue >= 0 and counts[final_queue]:
+            moved_out[final_queue] = 1
+
+        if 0 <= red_col < done_column and moved_out[red_col]:
+            if self.red_ahead:
+                self.red_ahead -= 1
+            else:
+                self.red_col = red_col + 1
+                self.red_ahead = counts[red_col + 1] - moved_out[red_col + 1]
+                if self.red_col == FIRST_STAGE_COLUMN: self.red_start = self.day
+        for col in range(done_column - 1, -1, -1):
+            if moved_out[col]:
+                counts[col] -= 1
+                counts[col + 1] += 1
+        if self.red_col != done_column and counts[0] < workflow.backlog_size:
+            counts[0] = workflow.backlog_size
+
+    def _state_key(self):
+        done_column = self.workflow.done_column
+        return (tuple(self.counts[:done_column]), tuple(self.head_pt), self.red_col)
+
+    def run(self, max_days: int = 10000) -> dict | None:
+        """Finishes the round within ``max_days`` more days; its metrics, or None if it does not finish."""
+        done_column = self.workflow.done_column
+        last_day = self.day + max_days
+        seen: dict[tuple, tuple] = {}
+        tracked_red_col = self.red_col
+        while self.red_col != done_column and self.day < last_day:
+            if self.red_col != tracked_red_col or len(seen) >= MAX_TRACKED_STATES:
+                seen.clear()
+                tracked_red_col = self.red_col
+            key = self._state_key()
+            previous = seen.get(key)
+            if previous is None:
+                seen[key] = (self.day, self.counts[done_column], self.red_ahead, self.BZ, self.WZ)
+            elif self._skip_periods(previous, last_day):
+                seen.clear()
+                continue
+            elif self.red_col >= 0 and previous[2] == self.red_ahead:
+                return None # The whole board, red card included, repeats: it never finishes
+            self.step()
+        return self.metrics() if self.red_col == done_column else None
+
+    def _skip_periods(self, previous, last_day: int) -> bool:
+        then_day, then_done, then_ahead, then_bz, then_wz = previous
+        period = self.day - then_day
+        if self.red_col < 0:
+            # Stop on the day before the red card is generated.
+            periods = (min(self.red_card_day - 1, last_day) - self.day) // period
+        else:
+            leaving_per_period = then_ahead - self.red_ahead
+            if leaving_per_period <= 0:
+                return False
+            periods = min(self.red_ahead // leaving_per_period, (last_day - self.day) // period)
+            self.red_ahead -= periods * leaving_per_period
+            self.BZ += periods * (self.BZ - then_bz)
+            self.WZ += periods * (self.WZ - then_wz)
+        if periods <= 0:
+            return False
+        self.counts[self.workflow.done_column] += periods * (self.counts[self.workflow.done_column] - then_done)
+        self.day += periods * period
+        self.skipped_days += periods * period
+        return True
+
+    def metrics(self) -> dict:
+        """Numeric round metrics, as KanbanModel.last_round_metrics."""
+        done_column = self.workflow.done_column
+        cycle_time = self.day - self.red_start
+        done = self.counts[done_column]
+        total = self.BZ + self.WZ
+        return {
+            "days": self.day,
+            "red_card_cycle_time": cycle_time,
+            "flow_efficiency": (self.BZ / total) * 100 if total > 0 else 0,
+            "in_progress": sum(self.counts[1:done_column]),
+            "done": done,
+            "throughput": done / cycle_time if cycle_time != 0 else 0,
+        }
@@ -0,0 +1,2 @@
+# kanban-python-backend/tests/__init__.py
+# Run the tests from kanban-python-backend: `python -m pytest tests`.
@@ -0,0 +1,164 @@
+# kanban-python-backend/tests/test_parity.py
+#
+# Day-by-day parity checks between the reference KanbanModel and alternative engines
+# (the VectorBoards kernel and the steady-state fast-forward of headless rounds), plus
+# snapshot round trips of every checked layout.
+
+import itertools
+
+import pytest
+
+import kanban_engine
+import vector_engine
+from workflow import DEFAULT_WORKFLOW, MAX_COLUMNS, Stage, Workflow, linear_workflow
+
+PARITY_COMPLEXITIES = [(1, 1, 4), (0, 0, 0), (2, 3, 1), (5, 1, 0), (3, 3, 3), (1, 2, 3)]
+PARITY_WIP_LIMITS = [1, 2, 3, 5, 12]
+PARITY_RED_CARD_DELAYS = [0, 1, 10, 25]
+# Layouts beyond the default board: many stages, stages without wait queues, WIP
+# groups shared by several stages and groups with a fixed limit.
+PARITY_WORKFLOWS = {
+    "linear-12": linear_workflow(12),
+    "no-wait": Workflow([Stage("A"), Stage("B", wait=None), Stage("C", wait=None), Stage("D")]),
+    "no-final-wait": Workflow([Stage("A"), Stage("B", wait=None)]),
+    "groups": Workflow(
+        [Stage("A", wip_group="dev"), Stage("B", wip_group="dev"), Stage("C", complexity=2),
+         Stage("D", wip_group="test", wait=None), Stage("E", wip_group="test")],
+        backlog_size=6, wip_groups={"test": 2},
+    ),
+}
+
+
+def parity_configs(workflow: Workflow = DEFAULT_WORKFLOW):
+    # Complexity tuples are repeated to the workflow's number of working columns.
+    stages = len(workflow.working_columns)
+    complexities = [tuple(itertools.islice(itertools.cycle(values), stages)) for values in PARITY_COMPLEXITIES]
+    return list(itertools.product(complexities, PARITY_WIP_LIMITS, PARITY_RED_CARD_DELAYS))
+
+
+def reference_day_state(model: kanban_engine.KanbanModel) -> tuple:
+    """Compact view of one board: column counts, head processing times and red card position."""
+    counts = tuple(len(column) for column in model.columns)
+    heads = tuple(model.columns[col][0].processing_time if model.columns[col] else 0
+                  for col in model.workflow.working_columns)
+    red = (-1, 0, 0, 0)
+    for col, column in enumerate(model.columns):
+        for ahead, card in enumerate(column):
+            if card.is_red:
+                red = (col, ahead if col < model.workflow.done_column else 0, card.BZ, card.WZ)
+    return counts, heads, red
+
+
+def vector_day_state(boards: vector_engine.VectorBoards, board: int) -> tuple:
+    counts = tuple(int(count) for count in boards.counts[board])
+    heads = tuple(int(boards.head_pt[board, col]) for col in boards.workflow.working_columns)
+    red_col = int(boards.red_col[board])
+    red_ahead = int(boards.red_ahead[board]) if 0 <= red_col < boards.workflow.done_column else 0
+    red = (red_col, red_ahead, int(boards.red_BZ[board]), int(boards.red_WZ[board]))
+    return counts, heads, red
+
+
+def check_vector_parity(configs=None, max_days: int = 3000, workflow: Workflow = DEFAULT_WORKFLOW) -> list[str]:
+    """Runs every config on KanbanModel and, as one batch, on VectorBoards; returns mismatches."""
+    configs = configs or parity_configs(workflow)
+    boards = vector_engine.VectorBoards([complexity for complexity, _, _ in configs],
+                                        [wip_limit for _, wip_limit, _ in configs],
+                                        [delay for _, _, delay in configs], workflow=workflow)
+    models = []
+    for complexity, wip_limit, delay in configs:
+        model = kanban_engine.KanbanModel(headless=True, workflow=workflow)
+        model._red_card_delay_days = delay
+        model.set_parameters({str(col): value for col, value in zip(workflow.working_columns, complexity)},
+                             wip_limit, 0.0)
+        model.start()
+        models.append(model)
+
+    failures = []
+    failed = set()
+    for _ in range(max_days):
+        running = [board for board, model in enumerate(models) if model.is_active() and board not in failed]
+        if not running:
+            break
+        boards.step()
+        for board in running:
+            model = models[board]
+            model.advance_one_simulation_step()
+            expected = reference_day_state(model)
+            actual = vector_day_state(boards, board)
+            if expected != actual or model.is_active() != bool(boards.active[board]):
+                failures.append(f"{configs[board]} day {model.day_count}: expected {expected}, got {actual}")
+                failed.add(board)
+
+    vector_metrics = boards.metrics()
+    for board, model in enumerate(models):
+        if board not in failed and model.last_round_metrics != vector_metrics[board]:
+            failures.append(f"{configs[board]} metrics: expected {model.last_round_metrics}, got {vector_metrics[board]}")
+    return failures
+
+
+FAST_FORWARD_COMPLEXITIES = PARITY_COMPLEXITIES + [(9, 2, 14), (20, 20, 20)]
+FAST_FORWARD_RED_CARD_DELAYS = [0, 10, 997, 4_000]
+FAST_FORWARD_MAX_DAYS = [30, 20_000] # A short limit also checks rounds that do not finish in time
+
+
+def check_fast_forward_parity(workflow: Workflow = DEFAULT_WORKFLOW) -> list[str]:
+    """Compares simulate_round with steady-state fast-forward against stepping every day."""
+    stages = len(workflow.working_columns)
+    failures = []
+    for values, wip_limit, delay, max_days in itertools.product(
+            FAST_FORWARD_COMPLEXITIES, PARITY_WIP_LIMITS + [0], FAST_FORWARD_RED_CARD_DELAYS, FAST_FORWARD_MAX_DAYS):
+        values = tuple(itertools.islice(itertools.cycle(values), stages))
+        complexity = {str(col): value for col, value in zip(workflow.working_columns, values)}
+        stepped = kanban_engine.simulate_round(complexity, wip_limit, delay, max_days, workflow=workflow, fast_forward=False)
+        skipped = kanban_engine.simulate_round(complexity, wip_limit, delay, max_days, workflow=workflow, fast_forward=True)
+        if stepped != skipped:
+            failures.append(f"{values} wip={wip_limit} delay={delay} max_days={max_days}: expected {stepped}, got {skipped}")
+    return failures
+
+
+def check_snapshot_round_trip(workflow: Workflow = DEFAULT_WORKFLOW, days=(0, 1, 50, 400)) -> list[str]:
+    """Snapshots a running board after each of ``days`` and compares the restored board card by card."""
+    failures = []
+    model = kanban_engine.KanbanModel(workflow=workflow, variability=0.3, seed=7)
+    model.set_parameters({}, 5, 0.0)
+    model._red_card_delay_days = 20
+    model.start()
+    for day in days:
+        while model.day_count < day and model.is_active():
+            model.advance_one_simulation_step()
+        try:
+            restored = kanban_engine.KanbanModel.from_snapshot(model.to_snapshot())
+            restored.check_invariants()
+        except Exception as exc:
+            failures.append(f"day {model.day_count}: {type(exc).__name__}: {exc}")
+            continue
+        expected = [[card.to_row() + (card.required_time,) for card in column] for column in model.columns]
+        got = [[card.to_row() + (card.required_time,) for card in column] for column in restored.columns]
+        if got != expected or restored.day_count != model.day_count or restored.workflow != model.workflow:
+            failures.append(f"day {model.day_count}: restored board differs")
+    return failures
+
+
+# --- Tests ---
+CHECKED_WORKFLOWS = {"default": DEFAULT_WORKFLOW, **PARITY_WORKFLOWS}
+workflow_params = pytest.mark.parametrize("workflow", CHECKED_WORKFLOWS.values(), ids=CHECKED_WORKFLOWS.keys())
+
+
+@workflow_params
+def test_vector_parity(workflow):
+    assert check_vector_parity(workflow=workflow) == []
+
+
+@workflow_params
+def test_fast_forward_parity(workflow):
+    assert check_fast_forward_parity(workflow) == []
+
+
+@workflow_params
+def test_snapshot_round_trip(workflow):
+    assert check_snapshot_round_trip(workflow) == []
+
+
+def test_snapshot_round_trip_max_width():
+    # The widest layout a workflow allows (254 columns) has the largest card positions.
+    assert check_snapshot_round_trip(linear_workflow((MAX_COLUMNS - 2) // 2)) == []
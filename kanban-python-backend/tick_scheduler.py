@@ -0,0 +1,198 @@
+# kanban-python-backend/tick_scheduler.py
+
+import asyncio
+import heapq
+import logging
+import os
+
+MIN_TICK_INTERVAL = float(os.environ.get("KANBAN_MIN_TICK_SECONDS", "0.001")) # Floor for speed = 0
+# Sessions due within this window of a wakeup are advanced in the same batch.
+TICK_GRANULARITY = float(os.environ.get("KANBAN_TICK_GRANULARITY_SECONDS", "0.005"))
+# A batch whose advance_batch call raised is retried this many seconds later.
+ERROR_RETRY_SECONDS = 1.0
+
+logger = logging.getLogger("kanban.scheduler")
+
+
+class TickScheduler:
+    """Advances every running simulation from a single asyncio task.
+
+    Sessions sit in a heap ordered by the time their next day is due. The scheduler
+    sleeps until the earliest due time, pops every session that is due by then (or
+    within ``granularity`` after it) and hands them to ``advance_batch`` in one call,
+    so the number of timers and wakeups does not grow with the number of sessions.
+
+    ``advance_batch(session_ids)`` returns ``(session_id, still_running, speed)`` per
+    session. A running session is due again ``speed`` seconds after its previous due
+    time (a fixed rate, not "sleep after work"), so slow batches do not accumulate
+    into drift. If a session falls more than one interval behind it skips the missed
+    ticks instead of bursting to catch up; the skipped time is reported as drift.
+    ``on_batch(results)`` runs after every batch (e.g. to publish board frames).
+
+    advance_batch is expected to handle failures per session (see
+    kanban_engine.advance_sessions_api). Should a whole call raise anyway, the error
+    is logged and its sessions are retried after ERROR_RETRY_SECONDS; an error in
+    on_batch is logged. Either way the scheduler task keeps running.
+    """
+
+    def __init__(self, advance_batch, on_batch=None, granularity: float = TICK_GRANULARITY):
+        self._advance_batch = advance_batch
+        self.granularity = granularity
+        self._on_batch = on_batch
+        self._heap: list[tuple[float, int, str]] = []
+        self._due: dict[str, int] = {} # session_id -> sequence number of its live heap entry
+        self._in_flight: set[str] = set() # Sessions of the batch currently being advanced
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._loop = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.wakeups = 0
+        self.steps = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_batch_seconds = 0.0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._lag_total = 0.0
+        self.drift = 0.0
+        self.skipped_ticks = 0
+
+    # --- Scheduling ---
+    def schedule(self, session_id: str, delay: float = 0.0):
+        """(Re)schedules a session's next day ``delay`` seconds from now."""
+        loop = self._loop or asyncio.get_running_loop()
+        self._push(session_id, loop.time() + delay)
+        self._wakeup.set()
+
+    def cancel(self, session_id: str) -> bool:
+        # The heap entry stays behind and is skipped when popped.
+        in_flight = session_id in self._in_flight
+        self._in_flight.discard(session_id)
+        return self._due.pop(session_id, None) is not None or in_flight
+
+    def is_scheduled(self, session_id: str) -> bool:
+        return session_id in self._due or session_id in self._in_flight
+
+    def __len__(self):
+        return len(self._due) + len(self._in_flight)
+
+    def _push(self, session_id: str, due: float):
+        self._seq += 1
+        self._due[session_id] = self._seq
+        heapq.heappush(self._heap, (due, self._seq, session_id))
+
+    # --- Lifecycle ---
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._heap.clear()
+        self._due.clear()
+        self._in_flight.clear()
+
+    async def _run(self):
+        loop = self._loop
+        while True:
+            # Drop cancelled entries from the top so the next due time is real.
+            while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][1]:
+                heapq.heappop(self._heap)
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            timeout = self._heap[0][0] - loop.time()
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                if loop.time() < self._heap[0][0]:
+                    continue # Woken early by schedule(); recompute the earliest due time
+            try:
+                await self._tick(loop)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Scheduler tick failed.")
+
+    async def _tick(self, loop):
+        now = loop.time()
+        self.wakeups += 1
+        batch = {}
+        horizon = now + self.granularity
+        while self._heap and self._heap[0][0] <= horizon:
+            due, seq, session_id = heapq.heappop(self._heap)
+            if self._due.get(session_id) != seq:
+                continue
+            del self._due[session_id]
+            batch[session_id] = due
+        if not batch:
+            return
+        lags = [max(0.0, now - due) for due in batch.values()]
+        self.last_lag = max(lags)
+        self.max_lag = max(self.max_lag, self.last_lag)
+        self._lag_total += sum(lags)
+        self.last_batch_size = len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        self.steps += len(batch)
+
+        self._in_flight = set(batch)
+        try:
+            results = await self._advance_batch(list(batch))
+        except Exception:
+            logger.exception("Advancing a batch of %d sessions failed; retrying in %ss.", len(batch), ERROR_RETRY_SECONDS)
+            for session_id in self._in_flight:
+                if session_id not in self._due:
+                    self._push(session_id, loop.time() + ERROR_RETRY_SECONDS)
+            return
+        finally:
+            in_flight, self._in_flight = self._in_flight, set()
+        finished_at = loop.time()
+        self.last_batch_seconds = finished_at - now
+        for session_id, running, speed in results:
+            # A session cancelled or re-scheduled while its step ran keeps that decision.
+            if not running or session_id not in in_flight or session_id in self._due:
+                continue
+            interval = max(speed, MIN_TICK_INTERVAL)
+            next_due = batch[session_id] + interval
+            if next_due < finished_at:
+                missed = int((finished_at - next_due) // interval) + 1
+                self.skipped_ticks += missed
+                self.drift += missed * interval
+                next_due += missed * interval
+            self._push(session_id, next_due)
+        if self._on_batch is not None:
+            try:
+                await self._on_batch(results)
+            except Exception:
+                logger.exception("Scheduler on_batch callback failed.")
+
+    def stats(self) -> dict:
+        return {
+            "scheduled_sessions": len(self),
+            "wakeups": self.wakeups,
+            "steps": self.steps,
+            "steps_per_wakeup": self.steps / self.wakeups if self.wakeups else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "last_batch_ms": self.last_batch_seconds * 1000,
+            "tick_lag_ms": {
+                "last": self.last_lag * 1000,
+                "mean": self._lag_total / self.steps * 1000 if self.steps else 0.0,
+                "max": self.max_lag * 1000,
+            },
+            "drift_ms": self.drift * 1000,
+            "skipped_ticks": self.skipped_ticks,
+        }
@@ -0,0 +1,200 @@
+# kanban-python-backend/vector_engine.py
+
+import numpy as np
+
+import kanban_engine
+from workflow import DEFAULT_WORKFLOW, FIRST_STAGE_COLUMN, Workflow
+
+
+class VectorBoards:
+    """B independent Kanban boards advanced one day at a time with array operations.
+
+    Cards never overtake each other and only the head card of a working column
+    accumulates processing time, so a board is fully described by its per-column card
+    counts, the processing time of each working column's head card and the red
+    card's column plus the number of cards ahead of it. Every rule of
+    KanbanModel.advance_one_simulation_step (push when the head is done, otherwise
+    pull from the previous column if the WIP group has room, final push to Done) is
+    applied to all boards at once, driven by the same workflow tables as the reference.
+
+    ``complexity`` has one row per board and one column per working column;
+    ``wip_limit`` and ``red_card_delay_days`` are per board (or scalars). All boards
+    of a batch share one ``workflow``.
+    """
+
+    def __init__(self, complexity, wip_limit, red_card_delay_days=kanban_engine.DEFAULT_RED_CARD_DELAY_DAYS,
+                 variability: float = 0.0, seed=None, workflow: Workflow = DEFAULT_WORKFLOW):
+        self.workflow = workflow
+        self.complexity = np.atleast_2d(np.asarray(complexity, dtype=np.int64))
+        boards = self.complexity.shape[0]
+        if self.complexity.shape[1] != len(workflow.working_columns):
+            raise ValueError(f"complexity needs one value per working column {workflow.working_columns}")
+        self.boards = boards
+        self.wip_limit = np.broadcast_to(np.asarray(wip_limit, dtype=np.int64), (boards,)).copy()
+        # Per group: the columns it counts and its limit per board (session limit or fixed).
+        self._group_columns = [np.asarray(columns) for columns in workflow.group_columns]
+        self._group_limits = [self.wip_limit if limit < 0 else np.full(boards, limit, dtype=np.int64)
+                              for limit in workflow.group_limits]
+        self._working = np.asarray(workflow.working_columns)
+        self._wait_owner = np.asarray(workflow.wait_owner)
+        self.red_card_day = np.broadcast_to(np.asarray(red_card_delay_days, dtype=np.int64), (boards,)).copy()
+        self.variability = variability
+        self._rng = np.random.default_rng(seed)
+
+        self.day = 0
+        self.active = np.ones(boards, dtype=bool)
+        columns = workflow.column_count
+        self.counts = np.zeros((boards, columns), dtype=np.int64)
+        self.counts[:, 0] = workflow.backlog_size
+        self.head_pt = np.zeros((boards, columns), dtype=np.int64)
+        # Per-card processing time drawn for the current head (-1: not drawn yet), only with variability.
+        self.head_required = np.full((boards, columns), -1, dtype=np.int64)
+
+        self.red_generated = np.zeros(boards, dtype=bool)
+        self.red_col = np.full(boards, -1, dtype=np.int64)
+        self.red_ahead = np.zeros(boards, dtype=np.int64)
+        self.red_BZ = np.zeros(boards, dtype=np.int64)
+        self.red_WZ = np.zeros(boards, dtype=np.int64)
+        self.red_start = np.zeros(boards, dtype=np.int64)
+        self.finish_day = np.full(boards, -1, dtype=np.int64)
+        self.finish_done = np.zeros(boards, dtype=np.int64)
+        self.finish_in_progress = np.zeros(boards, dtype=np.int64)
+
+        self._boards_index = np.arange(boards)
+
+    def step(self):
+        """Advances every still active board by one day."""
+        active = self.active
+        if not active.any():
+            return
+        self.day += 1
+        day = self.day
+        workflow = self.workflow
+        done_column = workflow.done_column
+        counts = self.counts
+        head_pt = self.head_pt
+        rows = self._boards_index
+
+        # 1. Red card: the head of the backlog turns red once its day has come.
+        generate = active & ~self.red_generated & (day >= self.red_card_day) & (counts[:, 0] > 0)
+        self.red_generated |= generate
+        self.red_col[generate] = 0
+        self.red_ahead[generate] = 0
+
+        # 2. Flow efficiency of the red card (work vs. blocked waiting time).
+        on_board = active & self.red_generated
+        red_col = self.red_col
+        in_work = on_board & np.isin(red_col, self._working)
+        self.red_BZ[in_work] += 1
+        owner = self._wait_owner[np.clip(red_col, 0, done_column)]
+        in_wait = on_board & (owner >= 0)
+        self.red_WZ[in_wait & (counts[rows, np.maximum(owner, 0)] > 0)] += 1
+
+        # 3. Working columns push their finished head card or pull a new one. Groups count
+        #    settled cards, i.e. without the ones already leaving their column today.
+        moved_out = np.zeros(counts.shape, dtype=bool)
+        for index, col in enumerate(workflow.working_columns):
+            has_head = active & (counts[:, col] > 0)
+            required = self.complexity[:, index]
+            if self.variability:
+                undrawn = has_head & (self.head_required[:, col] < 0)
+                if undrawn.any():
+                    spread = self.variability * np.maximum(required[undrawn], 1)
+                    drawn = np.rint(self._rng.normal(required[undrawn], spread))
+                    self.head_required[undrawn, col] = np.maximum(drawn, 0).astype(np.int64)
+                required = np.where(has_head, self.head_required[:, col], required)
+            push = has_head & (head_pt[:, col] >= required)
+            waiting = has_head & ~push
+            head_pt[waiting, col] += 1
+            head_pt[push, col] = 0
+            self.head_required[push, col] = -1
+            moved_out[:, col] = push
+
+            source = workflow.pull_source[col]
+            if source < 0:
+                continue
+            group = workflow.group_of[col]
+            group_cols = self._group_columns[group]
+            group_count = (counts[:, group_cols] - moved_out[:, group_cols]).sum(axis=1)
+            pull = active & ~push & (group_count < self._group_limits[group]) & (counts[:, source] > 0)
+            moved_out[:, source] |= pull
+
+        # 4. Final push from the last waiting column to Done.
+        if workflow.final_queue >= 0:
+            moved_out[:, workflow.final_queue] = active & (counts[:, workflow.final_queue] > 0)
+
+        # 5. Apply all moves at once: each moving card is a head and lands at the tail.
+        moved = moved_out.astype(np.int64)
+        remaining = counts - moved
+        arrivals = np.zeros_like(moved)
+        arrivals[:, 1:] = moved[:, :-1]
+
+        red_on_board = on_board & (red_col >= 0) & (red_col < done_column)
+        red_rows = rows[red_on_board]
+        red_cols = red_col[red_on_board]
+        red_leaves = moved_out[red_rows, red_cols] & (self.red_ahead[red_rows] == 0)
+        leaving_rows = red_rows[red_leaves]
+        staying_rows = red_rows[~red_leaves]
+        self.red_ahead[staying_rows] -= moved[staying_rows, red_col[staying_rows]]
+        new_cols = red_col[leaving_rows] + 1
+        self.red_ahead[leaving_rows] = remaining[leaving_rows, new_cols]
+        red_col[leaving_rows] = new_cols
+        started = leaving_rows[(new_cols == FIRST_STAGE_COLUMN) & (self.red_start[leaving_rows] == 0)]
+        self.red_start[started] = day
+
+        counts[:] = remaining + arrivals
+
+        finished = leaving_rows[new_cols == done_column]
+        if finished.size:
+            self.finish_day[finished] = day
+            self.finish_done[finished] = counts[finished, done_column]
+            self.finish_in_progress[finished] = counts[finished, 1:done_column].sum(axis=1)
+            self.active[finished] = False
+
+        # 6. Refill the backlog of boards that keep running.
+        refill = self.active & (counts[:, 0] < workflow.backlog_size)
+        counts[refill, 0] = workflow.backlog_size
+
+    def run(self, max_days: int = 10000):
+        while self.day < max_days and self.active.any():
+            self.step()
+        return self.metrics()
+
+    def metrics(self) -> list[dict | None]:
+        """Numeric round metrics per board, like KanbanModel.last_round_metrics (None if unfinished)."""
+        results = []
+        for board in range(self.boards):
+            if self.finish_day[board] < 0:
+                results.append(None)
+                continue
+            cycle_time = int(self.finish_day[board] - self.red_start[board])
+            done = int(self.finish_done[board])
+            work = int(self.red_BZ[board])
+            total = work + int(self.red_WZ[board])
+            results.append({
+                "days": int(self.finish_day[board]),
+                "red_card_cycle_time": cycle_time,
+                "flow_efficiency": (work / total) * 100 if total > 0 else 0,
+                "in_progress": int(self.finish_in_progress[board]),
+                "done": done,
+                "throughput": done / cycle_time if cycle_time != 0 else 0,
+            })
+        return results
+
+
+def simulate_rounds(configs: list[tuple[dict[str, int], int]], red_card_delay_days: int | None = None,
+                    max_days: int = 10000, variability: float = 0.0, seed=None,
+                    workflow: Workflow = DEFAULT_WORKFLOW) -> list[dict | None]:
+    """Runs one round per (complexity, wip_limit) config on a single VectorBoards batch.
+
+    Same results as calling kanban_engine.simulate_round for each config when there is
+    no variability (see tests/test_parity.py); with variability the draws come from one NumPy
+    generator for the whole batch, so individual rounds differ from the reference seeds.
+    """
+    if red_card_delay_days is None: red_card_delay_days = kanban_engine.DEFAULT_RED_CARD_DELAY_DAYS
+    complexity = [[config_complexity.get(str(col), workflow.default_complexity[col]) for col in workflow.working_columns]
+                  for config_complexity, _ in configs]
+    wip_limits = [wip_limit for _, wip_limit in configs]
+    boards = VectorBoards(complexity, wip_limits, red_card_delay_days, variability=variability, seed=seed,
+                          workflow=workflow)
+    return boards.run(max_days)
@@ -0,0 +1,93 @@
+# kanban-python-backend/wire_format.py
+
+import gzip
+import json
+import os
+
+import msgpack
+
+try:
+    import brotli # Optional: "br" is only offered when the package is installed
+except ImportError:
+    brotli = None
+
+# Representations of board and dashboard payloads, chosen with the Accept header.
+# "json" is the original nested layout; "columnar" holds one array per field (see
+# KanbanModel.get_current_board_columns) and "msgpack" is the columnar layout in
+# MessagePack.
+FORMAT_JSON = "json"
+FORMAT_COLUMNAR = "columnar"
+FORMAT_MSGPACK = "msgpack"
+MEDIA_TYPES = {
+    FORMAT_JSON: "application/json",
+    FORMAT_COLUMNAR: "application/vnd.kanban.columnar+json",
+    FORMAT_MSGPACK: "application/msgpack",
+}
+_FORMATS_BY_MEDIA_TYPE = {
+    **{media_type: fmt for fmt, media_type in MEDIA_TYPES.items()},
+    "application/x-msgpack": FORMAT_MSGPACK,
+    "application/*": FORMAT_JSON,
+    "*/*": FORMAT_JSON,
+}
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",) # In order of preference
+# Smaller bodies are sent uncompressed: the saving would not pay for the CPU time.
+COMPRESS_MIN_BYTES = int(os.environ.get("KANBAN_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _parse_header(header: str | None) -> list[tuple[str, float]]:
+    """(value, q) pairs of an Accept-style header, highest q first (stable for equal q)."""
+    entries = []
+    for part in (header or "").split(","):
+        value, *params = [item.strip() for item in part.split(";")]
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        entries.append((value.lower(), q))
+    return sorted(entries, key=lambda entry: -entry[1])
+
+
+def negotiate_format(accept: str | None) -> str | None:
+    """Format for an Accept header: JSON when absent, None if nothing acceptable is offered."""
+    if not accept:
+        return FORMAT_JSON
+    for media_type, q in _parse_header(accept):
+        if q > 0 and media_type in _FORMATS_BY_MEDIA_TYPE:
+            return _FORMATS_BY_MEDIA_TYPE[media_type]
+    return None
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    accepted = {coding: q for coding, q in _parse_header(accept_encoding)}
+    for coding in ENCODINGS:
+        if accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+    return None
+
+
+def encode(fmt: str, payload) -> bytes:
+    if fmt == FORMAT_MSGPACK:
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def compress(body: bytes, encoding: str | None) -> tuple[bytes, str | None]:
+    """(body, content encoding actually applied); small bodies stay uncompressed."""
+    if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), "gzip"
+
+
+def columns_from_rows(rows: list[dict], fields) -> dict:
+    """Columnar form of a list of same-shaped dicts: one array per field."""
+    return {field: [row[field] for row in rows] for field in fields}
@@ -0,0 +1,199 @@
+# kanban-python-backend/workflow.py
+
+import json
+
+# Every board starts with the backlog and ends with Done; the first stage's work
+# column directly follows the backlog (a red card's cycle time starts there).
+BACKLOG_COLUMN = 0
+FIRST_STAGE_COLUMN = 1
+MAX_COLUMNS = 255 # Snapshots store a card's column in one byte
+MAX_BACKLOG_SIZE = 1000 # The step refills the backlog to this size every day
+DEFAULT_WAIT_NAME = "Warten..."
+COLUMN_X_START = 50
+COLUMN_X_SPACING = 135 # Matches the frontend's narrow lane width
+SESSION_WIP_LIMIT = -1 # group_limits entry of groups that use the session's WIP limit
+
+
+class WorkflowError(ValueError):
+    """Raised for a workflow definition that cannot be compiled."""
+
+
+class Stage:
+    __slots__ = ("name", "wait", "complexity", "wip_group")
+
+    def __init__(self, name: str, wait: str | None = DEFAULT_WAIT_NAME, complexity: int = 1, wip_group: str | None = None):
+        self.name = name
+        self.wait = wait # Title of the stage's wait queue, None for a stage without one
+        self.complexity = complexity # Default days per card, overridden by the session's complexity parameter
+        self.wip_group = wip_group if wip_group is not None else name
+
+    def to_definition(self) -> dict:
+        return {"name": self.name, "wait": self.wait, "complexity": self.complexity, "wip_group": self.wip_group}
+
+
+class Workflow:
+    """A board layout: backlog, one work column (plus optional wait queue) per stage, Done.
+
+    The definition is validated once and compiled into flat per-column tables, so the
+    step loop indexes lists instead of branching on column numbers:
+
+    - ``working_columns``: work column of every stage, in board order
+    - ``pull_source[col]``: queue a work column pulls from (-1 if it is fed by pushes)
+    - ``group_of[col]`` / ``group_columns[group]`` / ``group_limits[group]``: WIP groups
+    - ``wait_owner[col]``: work column whose cards block a wait queue (-1 otherwise)
+    - ``is_working[col]``, ``default_complexity[col]``, ``x_positions[col]``
+    - ``final_queue``: wait queue pushed to Done every day (-1 if the last stage has none)
+
+    Every move goes from a column to the next one. A finished card moves into its
+    stage's wait queue; the next stage pulls it from there while its WIP group has
+    room. A stage without a wait queue pushes finished cards straight into the next
+    column, which then takes them regardless of its WIP group. A WIP group counts
+    the cards settled in its columns (work and wait) and uses the session's WIP limit
+    unless ``wip_groups`` gives it a fixed one.
+    """
+
+    def __init__(self, stages: list[Stage], backlog: str = "Backlog", done: str = "Done",
+                 backlog_size: int = 12, wip_groups: dict[str, int] | None = None):
+        self.stages = tuple(stages)
+        self.backlog = backlog
+        self.done = done
+        self.backlog_size = backlog_size
+        self.wip_groups = dict(wip_groups or {})
+        self._validate()
+        self._compile()
+        self.key = json.dumps(self.to_definition(), sort_keys=True, separators=(",", ":"))
+
+    @classmethod
+    def from_definition(cls, definition: dict) -> "Workflow":
+        """Builds a workflow from its JSON form (see to_definition); raises WorkflowError."""
+        if not isinstance(definition, dict) or not isinstance(definition.get("stages"), list):
+            raise WorkflowError("A workflow needs a list of stages.")
+        stages = []
+        for stage in definition["stages"]:
+            if not isinstance(stage, dict) or "name" not in stage:
+                raise WorkflowError("Every stage needs a name.")
+            stages.append(Stage(stage["name"], stage.get("wait", DEFAULT_WAIT_NAME),
+                                stage.get("complexity", 1), stage.get("wip_group")))
+        if not isinstance(definition.get("wip_groups") or {}, dict):
+            raise WorkflowError("wip_groups maps group names to WIP limits.")
+        return cls(stages, definition.get("backlog", "Backlog"), definition.get("done", "Done"),
+                   definition.get("backlog_size", 12), definition.get("wip_groups"))
+
+    def to_definition(self) -> dict:
+        return {
+            "backlog": self.backlog,
+            "done": self.done,
+            "backlog_size": self.backlog_size,
+            "stages": [stage.to_definition() for stage in self.stages],
+            "wip_groups": dict(self.wip_groups),
+        }
+
+    def describe(self) -> dict:
+        """Definition plus the compiled columns, as served to clients."""
+        columns = [
+            {
+                "id": col,
+                "title": self.column_names[col],
+                "kind": self.column_kinds[col],
+                "wip_group": self.group_names[self.group_of[col]] if self.group_of[col] >= 0 else None,
+            }
+            for col in range(self.column_count)
+        ]
+        return {"definition": self.to_definition(), "columns": columns, "working_columns": list(self.working_columns)}
+
+    def __eq__(self, other):
+        return isinstance(other, Workflow) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def _validate(self):
+        if not self.stages:
+            raise WorkflowError("A workflow needs at least one stage.")
+        names = [self.backlog, self.done]
+        for stage in self.stages:
+            names.append(stage.name)
+            if stage.wait is not None: names.append(stage.wait)
+            if not isinstance(stage.wip_group, str) or not stage.wip_group:
+                raise WorkflowError(f"Stage {stage.name!r} has an invalid WIP group.")
+            if type(stage.complexity) is not int or stage.complexity < 0:
+                raise WorkflowError(f"Stage {stage.name!r} needs a complexity >= 0.")
+        if not all(isinstance(name, str) and name for name in names):
+            raise WorkflowError("Column titles must be non-empty strings.")
+        if len({stage.name for stage in self.stages}) != len(self.stages):
+            raise WorkflowError("Stage names must be unique.")
+        column_count = 2 + sum(1 if stage.wait is None else 2 for stage in self.stages)
+        if column_count > MAX_COLUMNS:
+            raise WorkflowError(f"A workflow has at most {MAX_COLUMNS} columns, not {column_count}.")
+        if type(self.backlog_size) is not int or not 1 <= self.backlog_size <= MAX_BACKLOG_SIZE:
+            raise WorkflowError(f"backlog_size must be an integer between 1 and {MAX_BACKLOG_SIZE}.")
+        groups = {stage.wip_group for stage in self.stages}
+        for group, limit in self.wip_groups.items():
+            if group not in groups:
+                raise WorkflowError(f"WIP group {group!r} has no stages.")
+            if type(limit) is not int or limit < 0:
+                raise WorkflowError(f"WIP group {group!r} needs a limit >= 0.")
+
+    def _compile(self):
+        names, kinds = [self.backlog], ["backlog"]
+        working_columns, wait_owner_pairs, stage_columns = [], [], []
+        for stage in self.stages:
+            work_col = len(names)
+            names.append(stage.name)
+            kinds.append("work")
+            working_columns.append(work_col)
+            columns = [work_col]
+            if stage.wait is not None:
+                names.append(stage.wait)
+                kinds.append("wait")
+                wait_owner_pairs.append((len(names) - 1, work_col))
+                columns.append(len(names) - 1)
+            stage_columns.append((stage, columns))
+        names.append(self.done)
+        kinds.append("done")
+
+        count = len(names)
+        self.column_count = count
+        self.done_column = count - 1
+        self.column_names = tuple(names)
+        self.column_kinds = tuple(kinds)
+        self.working_columns = tuple(working_columns)
+        self.is_working = tuple(1 if kind == "work" else 0 for kind in kinds)
+        # A work column pulls from the queue before it (backlog or a wait queue); after
+        # another work column it only receives that column's pushes.
+        self.pull_source = tuple(col - 1 if kind == "work" and kinds[col - 1] != "work" else -1
+                                 for col, kind in enumerate(kinds))
+        wait_owner = [-1] * count
+        for wait_col, work_col in wait_owner_pairs:
+            wait_owner[wait_col] = work_col
+        self.wait_owner = tuple(wait_owner)
+        self.final_queue = count - 2 if kinds[count - 2] == "wait" else -1
+
+        group_names, group_columns, group_of = [], [], [-1] * count
+        for stage, columns in stage_columns:
+            if stage.wip_group not in group_names:
+                group_names.append(stage.wip_group)
+                group_columns.append([])
+            group = group_names.index(stage.wip_group)
+            group_columns[group].extend(columns)
+            for col in columns:
+                group_of[col] = group
+        self.group_names = tuple(group_names)
+        self.group_columns = tuple(tuple(columns) for columns in group_columns)
+        self.group_of = tuple(group_of)
+        self.group_limits = tuple(self.wip_groups.get(name, SESSION_WIP_LIMIT) for name in group_names)
+
+        default_complexity = [1] * count
+        for stage, columns in stage_columns:
+            default_complexity[columns[0]] = stage.complexity
+        self.default_complexity = tuple(default_complexity)
+        self.x_positions = tuple(COLUMN_X_START + COLUMN_X_SPACING * col for col in range(count))
+
+
+def linear_workflow(stage_count: int, wait: bool = True) -> Workflow:
+    """Workflow of ``stage_count`` stages named "Schritt 1", "Schritt 2", ... (benchmarks, larger boards)."""
+    return Workflow([Stage(f"Schritt {index}", DEFAULT_WAIT_NAME if wait else None) for index in range(1, stage_count + 1)])
+
+
+# The board the frontend was built for: Backlog, (work, wait) x 3, Done.
+DEFAULT_WORKFLOW = Workflow([Stage("Schritt A"), Stage("Schritt B"), Stage("Schritt C")])